@@ -0,0 +1,109 @@
+"""
+Solve playback for the GUIs.
+
+``solver.solve_steps`` makes the search one placement or undo at a time. A
+``SolveAnimation`` takes as many of those steps as are due each frame, so the
+event loop keeps running while a long search plays out and the window can be
+paused, sped up, cancelled or closed at any point. At high speeds many steps
+are taken per frame and only the state after the last one gets drawn.
+"""
+
+import contextlib
+import time
+
+import engine
+import solver
+
+# Steps per second for faster() / slower(); 0 takes max_per_frame every frame
+SPEEDS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 0)
+
+
+class SolveAnimation:
+    """
+    Plays a solve of a board back over many frames.
+    :param bo: 2D list representing the Sudoku board (solved in place)
+    :param speed: int (steps per second, 0 for as many as a frame allows)
+    :param max_per_frame: int (most steps taken in one frame)
+    :param stats: SearchStats to record the search in (optional)
+    """
+
+    def __init__(self, bo, speed=10, max_per_frame=2000, stats=None):
+        self.board = bo
+        self.puzzle = [row[:] for row in bo]  # For cancel() and finish()
+        self.steps = solver.solve_steps(bo, stats)
+        self.speed = speed
+        self.max_per_frame = max_per_frame
+        self.stats = stats
+        self.paused = False
+        self.result = None  # True once solved, False if unsolvable or cancelled
+        self.owed = 0.0  # Steps due but not taken yet
+        self.last = time.perf_counter()
+
+    @property
+    def running(self):
+        return self.result is None
+
+    def advance(self):
+        """
+        Takes the steps due since the last call. Call it once per frame.
+        :return: list of (PLACE or UNDO, row, col, num), already made on the board
+        """
+        now = time.perf_counter()
+        elapsed, self.last = now - self.last, now
+        if self.paused or self.result is not None:
+            return []
+
+        if self.speed:
+            self.owed = min(self.owed + self.speed * elapsed, self.max_per_frame)
+            count = int(self.owed)
+            self.owed -= count
+        else:
+            count = self.max_per_frame
+
+        taken = []
+        with self.stats.timing() if self.stats is not None else contextlib.nullcontext():
+            try:
+                for _ in range(count):
+                    taken.append(next(self.steps))
+            except StopIteration as stop:
+                self.result = stop.value
+        return taken
+
+    def pause(self):
+        """
+        Pauses a running animation, or resumes a paused one.
+        """
+        self.paused = not self.paused
+        self.last = time.perf_counter()
+
+    def faster(self):
+        self.speed = next((s for s in SPEEDS if s == 0 or s > self.speed > 0), self.speed)
+
+    def slower(self):
+        if self.speed == 0:
+            self.speed = SPEEDS[-2]
+        else:
+            self.speed = next((s for s in reversed(SPEEDS) if 0 < s < self.speed), self.speed)
+
+    def cancel(self):
+        """
+        Stops the search and puts the board back the way it started.
+        """
+        self.steps.close()
+        self._restore()
+        self.result = False
+
+    def finish(self):
+        """
+        Jumps straight to the end: solves what's left with the fast engine
+        instead of playing the rest of the search.
+        :return: bool (True if solved)
+        """
+        self.steps.close()
+        self._restore()
+        self.result = engine.solve(self.board)
+        return self.result
+
+    def _restore(self):
+        for row, given in zip(self.board, self.puzzle):
+            row[:] = given
@@ -0,0 +1,161 @@
+"""
+Batch solving across a pool of worker processes, and the line streaming the
+command-line tools built on it share.
+"""
+
+import itertools
+import multiprocessing
+import os
+import sys
+
+import solver
+
+WINDOW_CHUNKS = 8  # Chunks per worker read ahead when imap's window is True
+BUFFER_SIZE = 1 << 20  # Bytes of file buffering for pipe
+
+
+def _solve_one(job):
+    """
+    Worker entry point: solves one board.
+    :param job: tuple (index, board, solve_fn)
+    :return: tuple (index, solved board or None if it has no solution)
+    """
+    index, bo, solve_fn = job
+    bo = [row[:] for row in bo]
+    if solve_fn(bo):
+        return index, bo
+    return index, None
+
+
+def _jobs(puzzles, solve_fn):
+    for index, bo in enumerate(puzzles):
+        yield index, bo, solve_fn
+
+
+def _chunksize(items, workers, chunksize):
+    if chunksize is not None:
+        return chunksize
+    try:
+        total = len(items)
+    except TypeError:
+        return 16  # Streaming input, we can't see how much is coming
+    chunks, extra = divmod(total, workers * 4)
+    return max(1, chunks + bool(extra))
+
+
+def _blocks(items, size):
+    items = iter(items)
+    while True:
+        block = list(itertools.islice(items, size))
+        if not block:
+            return
+        yield block
+
+
+def imap(fn, items, workers=None, chunksize=None, ordered=True, window=None):
+    """
+    Applies a function to every item across a pool of worker processes.
+    :param fn: function (must be picklable, i.e. defined at module level)
+    :param items: iterable (consumed lazily)
+    :param workers: int (processes to use, defaults to the CPU count;
+                    1 runs in the calling process)
+    :param chunksize: int (items handed to a worker at a time)
+    :param ordered: bool (yield in input order instead of completion order)
+    :param window: int (read at most about twice this many items ahead of the
+                   results, for input too big to hold in memory; True sizes
+                   it to WINDOW_CHUNKS chunks per worker; None lets the pool
+                   read ahead as far as it likes)
+    :return: iterator of fn(item)
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for item in items:
+            yield fn(item)
+        return
+
+    chunksize = _chunksize(items, workers, chunksize)
+    if window is True:
+        window = workers * chunksize * WINDOW_CHUNKS
+    with multiprocessing.Pool(workers) as pool:
+        submit = pool.imap if ordered else pool.imap_unordered
+        if window is None:
+            yield from submit(fn, items, chunksize)
+            return
+
+        # Pool.imap reads its whole input up front, so hand it one block at a
+        # time, queueing the next block before draining the current one
+        pending = None
+        for block in _blocks(items, window):
+            results = submit(fn, block, chunksize)
+            if pending is not None:
+                yield from pending
+            pending = results
+        if pending is not None:
+            yield from pending
+
+
+def iter_solve_many(puzzles, workers=None, chunksize=None, ordered=False,
+                    solve_fn=solver.solve):
+    """
+    Solves many boards in parallel, yielding results as they finish.
+    :param puzzles: iterable of 2D lists (left untouched)
+    :param workers: int (processes to use, defaults to the CPU count;
+                    1 solves in the calling process)
+    :param chunksize: int (boards handed to a worker at a time)
+    :param ordered: bool (yield in input order instead of completion order)
+    :param solve_fn: function (solve(bo) -> bool, must be picklable)
+    :return: iterator of (index, solved board or None if it has no solution)
+    """
+    # Size the chunks from the puzzles, the job generator has no length
+    chunksize = _chunksize(puzzles, workers or os.cpu_count() or 1, chunksize)
+    return imap(_solve_one, _jobs(puzzles, solve_fn), workers, chunksize, ordered)
+
+
+def solve_many(puzzles, workers=None, chunksize=None, solve_fn=solver.solve):
+    """
+    Solves many boards in parallel.
+    :param puzzles: iterable of 2D lists (left untouched)
+    :param workers: int (processes to use, defaults to the CPU count)
+    :param chunksize: int (boards handed to a worker at a time)
+    :param solve_fn: function (solve(bo) -> bool, must be picklable)
+    :return: tuple (list of solved boards in input order with None for each
+             board that has no solution, list of indexes of those boards)
+    """
+    solutions = []
+    unsolved = []
+    for index, bo in iter_solve_many(puzzles, workers, chunksize, True, solve_fn):
+        solutions.append(bo)
+        if bo is None:
+            unsolved.append(index)
+    return solutions, unsolved
+
+
+def pipe(input_path, output_path, process, flush_every=1024):
+    """
+    Streams the lines of a file through a function and writes out what it
+    yields, collecting results so they're written a block at a time.
+    :param input_path: str (file to read, "-" for stdin)
+    :param output_path: str (file to write, "-" for stdout)
+    :param process: function(iterable of str) returning an iterable of str
+                    (each ending in a newline)
+    :param flush_every: int (results collected before each write)
+    :return: None
+    """
+    source = sys.stdin if input_path == "-" else open(input_path, buffering=BUFFER_SIZE)
+    try:
+        out = sys.stdout if output_path == "-" else open(output_path, "w", buffering=BUFFER_SIZE)
+        try:
+            pending = []
+            for text in process(source):
+                pending.append(text)
+                if len(pending) >= flush_every:
+                    out.write("".join(pending))
+                    pending.clear()
+            out.write("".join(pending))
+            out.flush()
+        finally:
+            if out is not sys.stdout:
+                out.close()
+    finally:
+        if source is not sys.stdin:
+            source.close()
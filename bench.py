@@ -0,0 +1,460 @@
+"""
+Benchmark harness for the solvers and generators.
+
+Runs each solving engine over the puzzle files in ``corpora/`` (one puzzle per
+line, ``0`` or ``.`` for blanks, ``#`` for comments) and times the puzzle
+generators, then prints a table and optionally writes the numbers as JSON so
+two runs can be compared:
+
+    python bench.py --out before.json
+    python bench.py --out after.json
+    python bench.py --compare before.json after.json
+
+Latency comes from a plain timing pass, which also gives node counts for the
+engines that keep them anyway. ``solver.solve`` only counts nodes when traced,
+so its counts come from a separate traced pass, and peak memory comes from a
+pass over the first few quick puzzles under ``tracemalloc``; either would
+otherwise slow the timings down. ``--max-seconds`` caps the time spent per
+engine and corpus (and per traced pass), since ``solver.solve`` can take
+minutes on a single puzzle: a timer signal interrupts the puzzle being solved
+when the budget runs out, and the row is reported as truncated after the
+puzzles it completed. Without ``signal.setitimer`` (e.g. on Windows) the
+budget is only checked between puzzles.
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import math
+import os
+import platform
+import random
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+
+import dlx
+import engine
+import generator
+import solver
+import tempCodeRunnerFile
+from board import Board
+from stats import SearchStats
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CORPORA_DIR = os.path.join(HERE, "corpora")
+
+
+class OutOfTime(Exception):
+    """
+    Raised from inside a solve once the benchmark's time budget has run out.
+    """
+
+
+@contextlib.contextmanager
+def time_limit(seconds):
+    """
+    Raises OutOfTime inside the ``with`` block once seconds have passed.
+    Needs SIGALRM, so it only works on the main thread of a Unix process;
+    anywhere else the block simply runs to the end.
+    :param seconds: float
+    """
+    if not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def expire(signum, frame):
+        raise OutOfTime()
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, max(seconds, 1e-6))
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def load_corpus(path):
+    """
+    Reads a puzzle file.
+    :param path: str
+    :return: list of 2D lists
+    """
+    puzzles = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                puzzles.append(Board.from_string(line).to_lists())
+    return puzzles
+
+
+def _solver(bo):
+    return solver.solve(bo), None
+
+
+def _solver_nodes(bo):
+    stats = SearchStats()
+    solver.solve(bo, stats)
+    return stats.nodes
+
+
+def _engine(select):
+    def run(bo):
+        search = engine.Engine(bo, select)
+        return search.search(), search.nodes
+    return run
+
+
+_matrix = None
+
+
+def _dlx_reset():
+    global _matrix
+    _matrix = None  # A search cut off part way leaves the matrix half covered
+
+
+def _dlx(bo):
+    global _matrix
+    if _matrix is None:
+        _matrix = dlx.CoverMatrix()
+    before = _matrix.nodes
+    return _matrix.solve(bo), _matrix.nodes - before
+
+
+# name -> function(bo) returning (solved, nodes expanded or None)
+ENGINES = {
+    "solver": _solver,
+    "engine": _engine("mrv"),
+    "engine-first": _engine("first"),
+    "dlx": _dlx,
+}
+
+# name -> function(bo) returning nodes expanded, for engines that only count
+# them when traced; run in a pass of their own so the timings stay untraced
+NODE_COUNTERS = {
+    "solver": _solver_nodes,
+}
+
+# name -> function() to call after a solve was interrupted
+RESETS = {
+    "dlx": _dlx_reset,
+}
+
+
+def _load_sudoku_final():
+    """
+    Imports sudoku(final).py, whose file name isn't a valid module name.
+    :return: the Sudoku class, or None if pygame isn't installed
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    spec = importlib.util.spec_from_file_location("sudoku_final", os.path.join(HERE, "sudoku(final).py"))
+    module = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(module)
+    except ImportError:
+        return None
+    return module.Sudoku
+
+
+def _sudoku_generate_board(difficulty):
+    sudoku_class = _load_sudoku_final()
+    if sudoku_class is None:
+        return None
+
+    def run():
+        game = sudoku_class.__new__(sudoku_class)  # Skip __init__, it opens the window
+        game.bank = None
+        game.prefetch = None  # Time the generation itself, not the queue
+        game.difficulty = difficulty
+        game.generate_board()
+    return run
+
+
+# name -> factory returning a no-argument function, or None if unavailable
+GENERATORS = {
+    "generate_sudoku": lambda: tempCodeRunnerFile.generate_sudoku,
+    "generator.generate": lambda: generator.generate,
+    "Sudoku.generate_board(Medium)": lambda: _sudoku_generate_board("Medium"),
+}
+
+
+def percentile(values, q):
+    """
+    Nearest-rank percentile.
+    :param values: sorted list of numbers
+    :param q: float (0-100)
+    :return: number (None for an empty list)
+    """
+    if not values:
+        return None
+    rank = max(1, math.ceil(q / 100.0 * len(values)))
+    return values[rank - 1]
+
+
+def _peak_memory(fn, args_list):
+    tracemalloc.start()
+    try:
+        for args in args_list:
+            fn(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _count_nodes(fn, puzzles, max_seconds):
+    """
+    Runs a traced pass for node counts, within its own time budget.
+    :return: list of int (one per puzzle counted before the budget ran out)
+    """
+    nodes = []
+    deadline = time.monotonic() + max_seconds
+    for puzzle in puzzles:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            with time_limit(remaining):
+                expanded = fn([row[:] for row in puzzle])
+        except OutOfTime:
+            break
+        nodes.append(expanded)
+    return nodes
+
+
+def _summary(latencies, elapsed):
+    latencies.sort()
+    return {
+        "count": len(latencies),
+        "seconds": elapsed,
+        "per_sec": len(latencies) / elapsed if elapsed else None,
+        "p50_ms": _ms(percentile(latencies, 50)),
+        "p95_ms": _ms(percentile(latencies, 95)),
+        "p99_ms": _ms(percentile(latencies, 99)),
+    }
+
+
+def _ms(seconds):
+    return None if seconds is None else seconds * 1000.0
+
+
+def bench_engine(name, puzzles, max_seconds=60.0, memory_sample=10):
+    """
+    Times one engine over a list of puzzles.
+    :param name: str (key of ENGINES)
+    :param puzzles: list of 2D lists (left untouched)
+    :param max_seconds: float (time budget; the puzzle being solved when it
+                        runs out is abandoned, see time_limit)
+    :param memory_sample: int (puzzles to run again under tracemalloc; only
+                          those that took under a second are used)
+    :return: dict
+    """
+    fn = ENGINES[name]
+    latencies = []
+    nodes = []
+    solved = 0
+    start = time.perf_counter()
+    deadline = time.monotonic() + max_seconds
+    for puzzle in puzzles:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        bo = [row[:] for row in puzzle]
+        try:
+            with time_limit(remaining):
+                t0 = time.perf_counter()
+                ok, expanded = fn(bo)
+                t1 = time.perf_counter()
+        except OutOfTime:
+            if name in RESETS:
+                RESETS[name]()
+            break
+        latencies.append(t1 - t0)
+        solved += bool(ok)
+        if expanded is not None:
+            nodes.append(expanded)
+    elapsed = time.perf_counter() - start
+
+    if name in NODE_COUNTERS:
+        nodes = _count_nodes(NODE_COUNTERS[name], puzzles[:len(latencies)], max_seconds)
+
+    # Only re-run puzzles that were quick the first time round
+    sample = [([row[:] for row in p],) for p, t in zip(puzzles, latencies) if t < 1.0][:memory_sample]
+
+    result = _summary(latencies, elapsed)
+    result.update({
+        "engine": name,
+        "puzzles": len(puzzles),
+        "solved": solved,
+        "truncated": len(latencies) < len(puzzles),
+        "nodes_mean": sum(nodes) / len(nodes) if nodes else None,
+        "peak_kib": _peak_memory(fn, sample) / 1024.0 if sample else None,
+    })
+    return result
+
+
+def bench_generator(name, count=20, memory_sample=3):
+    """
+    Times one generator.
+    :param name: str (key of GENERATORS)
+    :param count: int (puzzles to generate)
+    :param memory_sample: int (runs to repeat under tracemalloc)
+    :return: dict (None if the generator isn't available here)
+    """
+    fn = GENERATORS[name]()
+    if fn is None:
+        return None
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(count):
+        t0 = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+
+    result = _summary(latencies, elapsed)
+    result.update({
+        "generator": name,
+        "peak_kib": _peak_memory(fn, [()] * memory_sample) / 1024.0,
+    })
+    return result
+
+
+def run(engines, corpora, generators, generator_count, max_seconds, memory_sample):
+    """
+    Runs the whole benchmark.
+    :return: dict (the JSON report)
+    """
+    report = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "solvers": [],
+        "generators": [],
+    }
+
+    for corpus in corpora:
+        puzzles = load_corpus(os.path.join(CORPORA_DIR, corpus + ".txt"))
+        for name in engines:
+            result = bench_engine(name, puzzles, max_seconds, memory_sample)
+            result["corpus"] = corpus
+            report["solvers"].append(result)
+            _print_solver(result)
+
+    for name in generators:
+        result = bench_generator(name, generator_count)
+        if result is None:
+            print("%-32s skipped (pygame not installed)" % name)
+            continue
+        report["generators"].append(result)
+        _print_generator(result)
+
+    return report
+
+
+def _fmt(value, spec="%.2f"):
+    return "-" if value is None else spec % value
+
+
+def _print_solver(r):
+    print("%-12s %-12s %4d/%-4d %10s/s  p50 %8s ms  p95 %8s ms  p99 %8s ms  nodes %9s  peak %8s KiB%s" % (
+        r["corpus"], r["engine"], r["solved"], r["count"], _fmt(r["per_sec"], "%.1f"),
+        _fmt(r["p50_ms"]), _fmt(r["p95_ms"]), _fmt(r["p99_ms"]),
+        _fmt(r["nodes_mean"], "%.1f"), _fmt(r["peak_kib"], "%.1f"),
+        "  (truncated, %d of %d puzzles)" % (r["count"], r["puzzles"]) if r["truncated"] else ""))
+
+
+def _print_generator(r):
+    print("%-32s %10s/s  p50 %8s ms  p95 %8s ms  p99 %8s ms  peak %8s KiB" % (
+        r["generator"], _fmt(r["per_sec"]), _fmt(r["p50_ms"]), _fmt(r["p95_ms"]),
+        _fmt(r["p99_ms"]), _fmt(r["peak_kib"], "%.1f")))
+
+
+def compare(old, new):
+    """
+    Prints the throughput and median latency change between two reports.
+    :param old: dict (report)
+    :param new: dict (report)
+    :return: None
+    """
+    def change(a, b):
+        if not a or b is None:
+            return "-"
+        return "%+.1f%%" % ((b - a) / a * 100.0)
+
+    before = {(r["corpus"], r["engine"]): r for r in old["solvers"]}
+    for r in new["solvers"]:
+        o = before.get((r["corpus"], r["engine"]))
+        if o:
+            print("%-12s %-12s throughput %8s  p50 %8s  nodes %8s" % (
+                r["corpus"], r["engine"], change(o["per_sec"], r["per_sec"]),
+                change(o["p50_ms"], r["p50_ms"]), change(o["nodes_mean"], r["nodes_mean"])))
+
+    before = {r["generator"]: r for r in old["generators"]}
+    for r in new["generators"]:
+        o = before.get(r["generator"])
+        if o:
+            print("%-32s throughput %8s  p50 %8s" % (
+                r["generator"], change(o["per_sec"], r["per_sec"]), change(o["p50_ms"], r["p50_ms"])))
+
+
+def main(argv=None):
+    corpora = sorted(name[:-4] for name in os.listdir(CORPORA_DIR) if name.endswith(".txt"))
+    parser = argparse.ArgumentParser(description="Benchmark the Sudoku solvers and generators.")
+    parser.add_argument("--engines", default=",".join(ENGINES),
+                        help="comma-separated engines (default: %(default)s)")
+    parser.add_argument("--corpora", default=",".join(corpora),
+                        help="comma-separated corpora from corpora/ (default: %(default)s)")
+    parser.add_argument("--generators", default=",".join(GENERATORS),
+                        help="comma-separated generators, empty to skip")
+    parser.add_argument("--generator-count", type=int, default=20,
+                        help="puzzles per generator (default: %(default)s)")
+    parser.add_argument("--max-seconds", type=float, default=60.0,
+                        help="time budget per engine and corpus (default: %(default)s)")
+    parser.add_argument("--memory-sample", type=int, default=10,
+                        help="puzzles re-run under tracemalloc (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the generators")
+    parser.add_argument("--out", help="write the report as JSON")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"),
+                        help="compare two JSON reports instead of running")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            old = json.load(f)
+        with open(args.compare[1]) as f:
+            new = json.load(f)
+        compare(old, new)
+        return
+
+    for name in filter(None, args.engines.split(",")):
+        if name not in ENGINES:
+            parser.error("unknown engine %r" % name)
+    for name in filter(None, args.generators.split(",")):
+        if name not in GENERATORS:
+            parser.error("unknown generator %r" % name)
+
+    random.seed(args.seed)
+    report = run(
+        [e for e in args.engines.split(",") if e],
+        [c for c in args.corpora.split(",") if c],
+        [g for g in args.generators.split(",") if g],
+        args.generator_count,
+        args.max_seconds,
+        args.memory_sample,
+    )
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
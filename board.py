@@ -0,0 +1,173 @@
+"""
+Compact board type.
+
+A ``Board`` keeps its cells in a single ``bytearray`` in row-major order, so a
+copy is one allocation instead of one list per row, and it converts to and
+from the one-line string format (``0`` or ``.`` for an empty cell) with a
+single ``translate`` pass. ``view()`` gives a list-of-lists style view for
+code written against 2D lists, such as ``solver.solve`` and ``engine.solve``.
+"""
+
+import math
+
+SYMBOLS = "0123456789ABCDEFGHIJKLMNOP"  # Cell values 0..25, 0 for empty
+TO_TEXT = bytes.maketrans(bytes(range(len(SYMBOLS))), SYMBOLS.encode("ascii"))
+FROM_TEXT = bytes.maketrans((SYMBOLS + ".").encode("ascii"), bytes(range(len(SYMBOLS))) + b"\0")
+
+
+class Board:
+    """
+    An n²×n² Sudoku board backed by a bytearray.
+    :param size: int (9 for a 9x9 board)
+    :param cells: bytes-like of size * size cell values (taken over, not copied)
+    """
+
+    __slots__ = ("size", "cells")
+
+    def __init__(self, size=9, cells=None):
+        if cells is None:
+            cells = bytearray(size * size)
+        elif len(cells) != size * size:
+            raise ValueError("expected %d cells, got %d" % (size * size, len(cells)))
+        self.size = size
+        self.cells = cells if isinstance(cells, bytearray) else bytearray(cells)
+
+    @classmethod
+    def from_string(cls, text):
+        """
+        Parses the one-line format, e.g. an 81-character line for 9x9.
+        :param text: str or bytes (``0`` or ``.`` for an empty cell)
+        :return: Board
+        """
+        if isinstance(text, str):
+            text = text.encode("ascii")
+        text = text.strip()
+        n = math.isqrt(math.isqrt(len(text)))
+        if not n or n ** 4 != len(text):
+            raise ValueError("a board line must have n⁴ characters, got %d" % len(text))
+        cells = bytearray(text.translate(FROM_TEXT))
+        if max(cells) > n * n:
+            raise ValueError("unexpected character in %r" % text)
+        return cls(n * n, cells)
+
+    @classmethod
+    def from_lists(cls, bo):
+        """
+        :param bo: 2D list representing the Sudoku board
+        :return: Board
+        """
+        return cls(len(bo), bytearray(num for row in bo for num in row))
+
+    def to_string(self):
+        """
+        :return: str (one-line format, ``0`` for an empty cell)
+        """
+        return self.cells.translate(TO_TEXT).decode("ascii")
+
+    def to_lists(self):
+        """
+        :return: 2D list (a copy of the board)
+        """
+        size = self.size
+        return [list(self.cells[i:i + size]) for i in range(0, size * size, size)]
+
+    def view(self):
+        """
+        A list-of-lists style view that reads and writes this board's cells.
+        :return: BoardView
+        """
+        return BoardView(self)
+
+    def copy(self):
+        return Board(self.size, bytearray(self.cells))
+
+    def __getitem__(self, pos):
+        row, col = pos
+        return self.cells[row * self.size + col]
+
+    def __setitem__(self, pos, num):
+        row, col = pos
+        self.cells[row * self.size + col] = num
+
+    def __len__(self):
+        return self.size
+
+    def __eq__(self, other):
+        if not isinstance(other, Board):
+            return NotImplemented
+        return self.size == other.size and self.cells == other.cells
+
+    def __hash__(self):
+        # Boards are mutable; don't change one while it's a dict key or in a set
+        return hash(bytes(self.cells))
+
+    def __repr__(self):
+        return "Board(%r)" % self.to_string()
+
+    def __str__(self):
+        return self.to_string()
+
+
+class RowView:
+    """
+    One row of a ``BoardView``.
+    """
+
+    __slots__ = ("cells", "start", "size")
+
+    def __init__(self, cells, start, size):
+        self.cells = cells
+        self.start = start
+        self.size = size
+
+    def __getitem__(self, col):
+        if isinstance(col, slice):
+            return list(self.cells[self.start:self.start + self.size][col])
+        if col < 0:
+            col += self.size
+        if not 0 <= col < self.size:
+            raise IndexError("column index out of range")
+        return self.cells[self.start + col]
+
+    def __setitem__(self, col, num):
+        if col < 0:
+            col += self.size
+        if not 0 <= col < self.size:
+            raise IndexError("column index out of range")
+        self.cells[self.start + col] = num
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return iter(self.cells[self.start:self.start + self.size])
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class BoardView:
+    """
+    Presents a ``Board`` as a list of rows, so ``bo[row][col]`` reads and
+    writes the board's cells directly.
+    :param board: Board
+    """
+
+    __slots__ = ("board", "rows")
+
+    def __init__(self, board):
+        self.board = board
+        size = board.size
+        self.rows = [RowView(board.cells, i * size, size) for i in range(size)]
+
+    def __getitem__(self, row):
+        return self.rows[row]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
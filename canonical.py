@@ -0,0 +1,274 @@
+"""
+Canonical forms of Sudoku boards.
+
+Two boards are equivalent if one turns into the other by some mix of:
+- relabelling the digits
+- swapping bands, or rows within a band
+- swapping stacks, or columns within a stack
+- transposing
+
+The canonical form of a board is the smallest 81-character string, reading
+row by row with 0 for an empty cell, over all of its equivalent boards.
+Equivalent boards have the same canonical form, so it works as a
+deduplication key or a cache key.
+
+There are up to 2·6⁸ ≈ 3.4 million cell arrangements per board, so they
+aren't tried one by one. The form is built a row at a time, and a partial
+transform only survives if it ties for the smallest prefix so far.
+
+For a fixed arrangement, relabelling by first appearance gives the smallest
+string. Row 1 holds each digit at most once, so its best string depends only
+on where its blanks are: stacks with the most blanks go first, blanks first
+within each stack. That rules out most first rows and column orders before
+any digits are compared.
+
+Sparse or symmetric boards tie a lot: on an empty board every arrangement
+ties at every row. Partial transforms that leave the same thing to place
+(the same relabelled rows still free, with the same digits labelled so far)
+can only go on to produce the same rows, so once there are ``MERGE_FROM`` or
+more of them only one of each such group is kept.
+
+At most ``MAX_STATES`` first rows are looked at, and at most ``MAX_STATES``
+partial transforms are followed from one row to the next. A 9x9 board has at
+most 23328 first rows, so its first row is never cut short; the limit is
+there for larger boards (a sparse 16x16 one, say). Past the limit the rest
+are dropped: the result is still a
+transform of the board, but maybe not the smallest, so equivalent boards can
+come out with different forms (a duplicate missed by ``dedup.py``, a cache
+miss in ``solution_cache.py``). Boards that aren't equivalent never share a
+form.
+"""
+
+import collections
+import itertools
+
+from board import SYMBOLS
+from solver import box_size
+
+MAX_STATES = 25000  # Partial transforms followed per row, see above
+MERGE_FROM = 5000  # Fewer ties than this are cheaper to follow than to merge
+
+Transform = collections.namedtuple("Transform", "transpose rows cols digits")
+Transform.__doc__ = """
+How a board maps onto its canonical form.
+transpose: bool (transpose the board first)
+rows: tuple (source row of each canonical row)
+cols: tuple (source column of each canonical column)
+digits: tuple (canonical digit for each source digit, digits[0] == 0)
+"""
+
+
+def _first_row_key(row, n):
+    """
+    How good a row is as the first row: its best string is blanks in the
+    stacks with the most blanks first, so compare blank counts per stack.
+    :param row: tuple (cell values)
+    :param n: int (box size)
+    :return: tuple (smaller is better)
+    """
+    return tuple(sorted(-row[s * n:s * n + n].count(0) for s in range(n)))
+
+
+def _first_row_orders(row, n):
+    """
+    Column orders that put a row's blanks as early as possible.
+    :param row: tuple (cell values)
+    :param n: int (box size)
+    :return: iterator of column orders
+    """
+    stacks = []
+    for s in range(n):
+        cols = range(s * n, s * n + n)
+        blanks = [c for c in cols if not row[c]]
+        digits = [c for c in cols if row[c]]
+        stacks.append((len(blanks), blanks, digits))
+    stacks.sort(key=lambda stack: -stack[0])
+
+    # Stacks with as many blanks as each other can go in either order, and
+    # blanks (or digits) can be swapped among themselves within a stack
+    groups = [list(group) for _, group in itertools.groupby(stacks, key=lambda stack: stack[0])]
+    stack_orders = itertools.product(*(itertools.permutations(group) for group in groups))
+    for stack_order in stack_orders:
+        stack_order = [stack for group in stack_order for stack in group]
+        inner = [
+            [blanks + digits for blanks in itertools.permutations(b) for digits in itertools.permutations(d)]
+            for _, b, d in stack_order
+        ]
+        for parts in itertools.product(*inner):
+            yield sum(parts, ())
+
+
+def _next_rows(rows, n):
+    """
+    Source rows that may come next: the rest of the current band, or any row
+    of an unused band once a band is complete.
+    """
+    if len(rows) % n:
+        band = rows[-1] // n
+        return [r for r in range(band * n, band * n + n) if r not in rows]
+    used = {r // n for r in rows}
+    return [r for r in range(n * n) if r // n not in used]
+
+
+def _remaining(grid, rows, cols, digits, n):
+    """
+    What a partial transform has left to place: the unused rows under its
+    column order and labels (-d for a digit not labelled yet), in the groups
+    they can still be picked from. Two partial transforms with the same
+    result here build the same rest of the form.
+    :return: tuple (hashable)
+    """
+    def content(r):
+        src = grid[r]
+        return tuple(digits.get(src[c]) or -src[c] for c in cols)
+
+    used = set(rows)
+    bands = {r // n for r in rows}
+    current = ()
+    if len(rows) % n:
+        band = rows[-1] // n
+        current = tuple(sorted(content(r) for r in range(band * n, band * n + n) if r not in used))
+    rest = tuple(sorted(
+        tuple(sorted(content(r) for r in range(band * n, band * n + n)))
+        for band in range(n) if band not in bands))
+    return len(digits), current, rest
+
+
+def _merge(states, grids, n):
+    """
+    Drops partial transforms that have the same left to place as an earlier
+    one, then applies the MAX_STATES cap.
+    :param states: list of (transpose, rows, cols, digits)
+    :return: list of (transpose, rows, cols, digits)
+    """
+    if len(states) < MERGE_FROM:
+        return states
+    seen = set()
+    merged = []
+    for state in states:
+        transpose, rows, cols, digits = state
+        key = _remaining(grids[transpose], rows, cols, digits, n)
+        if key not in seen:
+            seen.add(key)
+            merged.append(state)
+            if len(merged) == MAX_STATES:
+                break
+    return merged
+
+
+def canonical_transform(bo):
+    """
+    Finds the canonical form of a board and a transform that produces it.
+    :param bo: 2D list representing the Sudoku board (left unchanged)
+    :return: tuple (canonical form as str, Transform)
+    """
+    size = len(bo)
+    n = box_size(bo)
+    grids = (tuple(tuple(row) for row in bo), tuple(zip(*bo)))
+
+    # Row 1: pick the source rows and column orders with the best blank pattern
+    keys = {(transpose, r): _first_row_key(grid[r], n) for transpose, grid in enumerate(grids) for r in range(size)}
+    best = min(keys.values())
+
+    def first_rows():
+        for (transpose, r), key in keys.items():
+            if key == best:
+                src = grids[transpose][r]
+                for cols in _first_row_orders(src, n):
+                    digits = {}
+                    for c in cols:
+                        if src[c]:
+                            digits[src[c]] = len(digits) + 1
+                    yield transpose, (r,), cols, digits
+
+    states = _merge(list(itertools.islice(first_rows(), MAX_STATES)), grids, n)
+
+    transpose, rows, cols, digits = states[0]
+    out = [[digits.get(grids[transpose][rows[0]][c], 0) for c in cols]]
+
+    # Other rows: extend every surviving state by every allowed row and keep
+    # only those that tie for the smallest row
+    for _ in range(1, size):
+        best = None
+        survivors = []
+        for state in states:
+            transpose, rows, cols, digits = state
+            grid = grids[transpose]
+            for r in _next_rows(rows, n):
+                src = grid[r]
+                label = len(digits) + 1
+                extra = {}
+                key = []
+                order = 0 if best else -1  # Compared with best so far: -1 less, 0 equal, 1 greater
+                for i, c in enumerate(cols):
+                    num = src[c]
+                    if num:
+                        num = digits.get(num) or extra.get(num)
+                        if num is None:
+                            num = extra[src[c]] = label + len(extra)
+                    if not order:
+                        if num > best[i]:
+                            order = 1
+                            break  # Already worse, no need to finish the row
+                        if num < best[i]:
+                            order = -1
+                    key.append(num)
+                if order > 0:
+                    continue
+                if order < 0:
+                    best = key
+                    survivors = []
+                survivors.append((state, r, extra))
+        states = [
+            (transpose, rows + (r,), cols, {**digits, **extra} if extra else digits)
+            for (transpose, rows, cols, digits), r, extra in survivors
+        ]
+        states = _merge(states, grids, n)
+        out.append(best)
+
+    transpose, rows, cols, digits = states[0]
+    # Digits the board doesn't use get the remaining labels in order
+    unused = iter(range(len(digits) + 1, size + 1))
+    mapping = [0] + [digits.get(num) or next(unused) for num in range(1, size + 1)]
+    form = "".join(SYMBOLS[num] for row in out for num in row)
+    return form, Transform(bool(transpose), rows, cols, tuple(mapping))
+
+
+def canonical(bo):
+    """
+    Canonical form of a board.
+    :param bo: 2D list representing the Sudoku board (left unchanged)
+    :return: str (one-line format, e.g. 81 characters for 9x9)
+    """
+    return canonical_transform(bo)[0]
+
+
+def apply_transform(bo, transform):
+    """
+    Applies a transform, e.g. to take a board to its canonical form.
+    :param bo: 2D list representing the Sudoku board (left unchanged)
+    :param transform: Transform
+    :return: 2D list
+    """
+    grid = [list(col) for col in zip(*bo)] if transform.transpose else bo
+    digits = transform.digits
+    return [[digits[grid[r][c]] for c in transform.cols] for r in transform.rows]
+
+
+def undo_transform(bo, transform):
+    """
+    Reverses ``apply_transform``, e.g. to bring a solution of the canonical
+    form back to the original board.
+    :param bo: 2D list (in canonical coordinates, left unchanged)
+    :param transform: Transform
+    :return: 2D list
+    """
+    size = len(bo)
+    inverse = [0] * (size + 1)
+    for num, label in enumerate(transform.digits):
+        inverse[label] = num
+    grid = [[0] * size for _ in range(size)]
+    for i, r in enumerate(transform.rows):
+        for j, c in enumerate(transform.cols):
+            grid[r][c] = inverse[bo[i][j]]
+    return [list(col) for col in zip(*grid)] if transform.transpose else grid
@@ -0,0 +1,120 @@
+"""
+Incremental board index for interactive play.
+
+Keeps, for every row, column and box, how many times each digit appears and a
+bitmask of the digits present (bit d-1 for digit d). Changing a cell updates
+the three units it belongs to, so checking a move, listing a cell's remaining
+candidates, spotting a conflict or counting filled cells never has to rescan
+the board. That makes it cheap enough to ask every frame, e.g. for pencil
+marks and conflict highlighting.
+"""
+
+from solver import box_size
+
+
+class ConflictIndex:
+    """
+    Digit counts and masks per unit of a board.
+    :param bo: 2D list representing the Sudoku board (copied, not kept)
+    """
+
+    def __init__(self, bo):
+        self.size = len(bo)
+        self.n = box_size(bo)
+        self.all_digits = (1 << self.size) - 1
+        self.values = [[0] * self.size for _ in range(self.size)]
+        # counts[unit][num] and masks[unit] for rows, then columns, then boxes
+        self.counts = [[0] * (self.size + 1) for _ in range(3 * self.size)]
+        self.masks = [0] * (3 * self.size)
+        self.filled = 0  # Non-empty cells
+        self.duplicates = 0  # Extra copies of digits across all units
+        for row in range(self.size):
+            for col in range(self.size):
+                if bo[row][col]:
+                    self.set(row, col, bo[row][col])
+
+    def units(self, row, col):
+        """
+        :return: tuple (row unit, column unit, box unit) indexes into counts and masks
+        """
+        return row, self.size + col, 2 * self.size + row // self.n * self.n + col // self.n
+
+    def set(self, row, col, num):
+        """
+        Puts a digit in a cell, or clears it with 0.
+        :return: int (the cell's previous value)
+        """
+        old = self.values[row][col]
+        if old == num:
+            return old
+        counts, masks = self.counts, self.masks
+        units = self.units(row, col)
+        if old:
+            bit = 1 << (old - 1)
+            for unit in units:
+                counts[unit][old] -= 1
+                if counts[unit][old]:
+                    self.duplicates -= 1
+                else:
+                    masks[unit] &= ~bit
+            self.filled -= 1
+        if num:
+            bit = 1 << (num - 1)
+            for unit in units:
+                if counts[unit][num]:
+                    self.duplicates += 1
+                else:
+                    masks[unit] |= bit
+                counts[unit][num] += 1
+            self.filled += 1
+        self.values[row][col] = num
+        return old
+
+    def clear(self, row, col):
+        return self.set(row, col, 0)
+
+    def can_place(self, row, col, num):
+        """
+        :return: bool (True if no other cell in the row, column or box has num)
+        """
+        own = self.values[row][col] == num
+        counts = self.counts
+        return all(counts[unit][num] - own == 0 for unit in self.units(row, col))
+
+    def candidates(self, row, col):
+        """
+        Digits that could go in a cell, ignoring the cell's own value.
+        :return: int (bitmask, bit d-1 for digit d)
+        """
+        r, c, b = self.units(row, col)
+        used = self.masks[r] | self.masks[c] | self.masks[b]
+        num = self.values[row][col]
+        if num and self.can_place(row, col, num):
+            used &= ~(1 << (num - 1))  # Only the cell itself has it
+        return self.all_digits & ~used
+
+    def candidate_list(self, row, col):
+        """
+        :return: list of int (the digits in candidates(row, col))
+        """
+        mask = self.candidates(row, col)
+        return [num for num in range(1, self.size + 1) if mask >> (num - 1) & 1]
+
+    def conflicts(self, row, col):
+        """
+        :return: bool (True if the cell's digit also appears elsewhere in its row, column or box)
+        """
+        num = self.values[row][col]
+        return bool(num) and not self.can_place(row, col, num)
+
+    def has_conflicts(self):
+        return self.duplicates > 0
+
+    def is_full(self):
+        return self.filled == self.size * self.size
+
+    def is_solved(self):
+        """
+        :return: bool (True if every cell is filled and nothing conflicts)
+        """
+        return self.filled == self.size * self.size and not self.duplicates
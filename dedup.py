@@ -0,0 +1,95 @@
+"""
+Removes equivalent puzzles from a puzzle file.
+
+    python dedup.py puzzles.txt -o unique.txt --workers 4
+
+Reads one puzzle per line (``0`` or ``.`` for an empty cell) from a file or
+stdin. Writes each puzzle whose canonical form (see ``canonical.py``) hasn't
+been seen earlier in the stream, in input order, or its canonical form with
+``--canonical``.
+
+The canonical forms are computed across worker processes. The parent keeps
+only a 64-bit hash of each form it has seen, so the whole run is a single
+pass with memory proportional to the number of unique puzzles (roughly 60
+bytes each).
+"""
+
+import argparse
+import hashlib
+import sys
+
+import batch
+from board import Board
+from canonical import canonical
+
+
+def _canonical_line(line):
+    """
+    Worker entry point.
+    :return: tuple (line, canonical form, or None if the line isn't a board)
+    """
+    try:
+        return line, canonical(Board.from_string(line).to_lists())
+    except ValueError:
+        return line, None
+
+
+def digest(form):
+    """
+    :param form: str (canonical form)
+    :return: int (64-bit hash, stable across runs)
+    """
+    return int.from_bytes(hashlib.blake2b(form.encode("ascii"), digest_size=8).digest(), "little")
+
+
+def dedup(lines, workers=None, chunksize=64, seen=None):
+    """
+    Filters a stream of puzzle lines down to one per equivalence class.
+    :param lines: iterable of str (blank and ``#`` lines are skipped)
+    :param workers: int (processes to use, defaults to the CPU count)
+    :param chunksize: int (puzzles handed to a worker at a time)
+    :param seen: set (digests seen so far, updated in place; pass one in to
+                 dedup several files against each other)
+    :return: iterator of tuple (line, canonical form) for each new puzzle;
+             lines that aren't boards come through with a None form
+    """
+    seen = set() if seen is None else seen
+    jobs = (line for line in (raw.strip() for raw in lines) if line and not line.startswith("#"))
+    for line, form in batch.imap(_canonical_line, jobs, workers, chunksize, True, True):
+        if form is None:
+            yield line, None
+            continue
+        key = digest(form)
+        if key not in seen:
+            seen.add(key)
+            yield line, form
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Remove equivalent puzzles from a puzzle file.")
+    parser.add_argument("input", nargs="?", default="-", help="puzzle file (default: stdin)")
+    parser.add_argument("-o", "--output", default="-", help="where to write unique puzzles (default: stdout)")
+    parser.add_argument("-w", "--workers", type=int, help="processes to use (default: the CPU count)")
+    parser.add_argument("--chunksize", type=int, default=64,
+                        help="puzzles handed to a worker at a time (default: %(default)s)")
+    parser.add_argument("--canonical", action="store_true",
+                        help="write the canonical form instead of the puzzle as given")
+    args = parser.parse_args(argv)
+
+    seen = set()
+    invalid = 0
+
+    def unique(source):
+        nonlocal invalid
+        for line, form in dedup(source, args.workers, args.chunksize, seen):
+            if form is None:
+                invalid += 1
+                continue
+            yield (form if args.canonical else line) + "\n"
+
+    batch.pipe(args.input, args.output, unique)
+    print("%d unique puzzles, %d invalid lines skipped" % (len(seen), invalid), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Dancing Links (Knuth's Algorithm X) backend.
+
+Sudoku is modelled as an exact-cover problem with one row per cell and digit
+(729 for 9x9) and one column per constraint (324 for 9x9): every cell holds one
+digit, and every row, column and box holds every digit once. The links are stored in flat integer lists indexed
+by node number instead of one Python object per node.
+"""
+
+from solver import box_size
+
+
+class CoverMatrix:
+    """
+    The Sudoku exact-cover matrix. Building it is the expensive part, so one
+    instance can be reused across puzzles; every solve leaves it exactly as it
+    found it.
+    :param n: int (box size, 3 for 9x9 boards)
+    """
+
+    def __init__(self, n=3):
+        self.n = n
+        self.size = size = n * n
+        cells = size * size
+        columns = 4 * cells
+
+        # Node 0 is the root, nodes 1..columns are the column headers
+        self.left = [i - 1 for i in range(columns + 1)]
+        self.right = [i + 1 for i in range(columns + 1)]
+        self.left[0] = columns
+        self.right[columns] = 0
+        self.up = list(range(columns + 1))
+        self.down = list(range(columns + 1))
+        self.column = list(range(columns + 1))
+        self.row_id = [-1] * (columns + 1)
+        self.count = [0] * (columns + 1)
+        self.row_start = []
+        self.nodes = 0  # Search nodes expanded, over every solve
+
+        for row in range(size):
+            for col in range(size):
+                box = (row // n) * n + col // n
+                for d in range(size):
+                    self.add_row((row * size + col) * size + d, (
+                        1 + row * size + col,
+                        1 + cells + row * size + d,
+                        1 + 2 * cells + col * size + d,
+                        1 + 3 * cells + box * size + d,
+                    ))
+
+    def add_row(self, row_id, columns):
+        """
+        Appends one matrix row with a node in each of the given columns.
+        :param row_id: int ((row * size + col) * size + digit - 1)
+        :param columns: tuple of column header indexes
+        :return: None
+        """
+        first = len(self.column)
+        self.row_start.append(first)
+        for k, c in enumerate(columns):
+            node = first + k
+            self.left.append(first + (k - 1) % len(columns))
+            self.right.append(first + (k + 1) % len(columns))
+            self.up.append(self.up[c])
+            self.down.append(c)
+            self.down[self.up[c]] = node
+            self.up[c] = node
+            self.column.append(c)
+            self.row_id.append(row_id)
+            self.count[c] += 1
+
+    def cover(self, c):
+        """
+        Removes a column and every row that has a node in it.
+        :param c: int (column header index)
+        :return: None
+        """
+        left, right, up, down = self.left, self.right, self.up, self.down
+        column, count = self.column, self.count
+        right[left[c]] = right[c]
+        left[right[c]] = left[c]
+        i = down[c]
+        while i != c:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                count[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(self, c):
+        """
+        Reverses ``cover``.
+        :param c: int (column header index)
+        :return: None
+        """
+        left, right, up, down = self.left, self.right, self.up, self.down
+        column, count = self.column, self.count
+        i = up[c]
+        while i != c:
+            j = left[i]
+            while j != i:
+                count[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[c]] = c
+        left[right[c]] = c
+
+    def select(self, node):
+        """
+        Covers every column of the row that ``node`` belongs to.
+        :return: None
+        """
+        self.cover(self.column[node])
+        j = self.right[node]
+        while j != node:
+            self.cover(self.column[j])
+            j = self.right[j]
+
+    def deselect(self, node):
+        """
+        Reverses ``select``.
+        :return: None
+        """
+        j = self.left[node]
+        while j != node:
+            self.uncover(self.column[j])
+            j = self.left[j]
+        self.uncover(self.column[node])
+
+    def search(self, chosen):
+        """
+        Algorithm X, branching on the column with the fewest rows left.
+        :param chosen: list of selected nodes (appended to on success)
+        :return: bool (True if an exact cover was found)
+        """
+        self.nodes += 1
+        right, down, count = self.right, self.down, self.count
+        c = right[0]
+        if c == 0:
+            return True
+
+        best = c
+        while c != 0:
+            if count[c] < count[best]:
+                best = c
+                if count[c] <= 1:
+                    break
+            c = right[c]
+
+        if count[best] == 0:
+            return False
+
+        found = False
+        self.cover(best)
+        r = down[best]
+        while r != best:
+            j = right[r]
+            while j != r:
+                self.cover(self.column[j])
+                j = right[j]
+
+            chosen.append(r)
+            found = self.search(chosen)
+
+            # Unwind even on success, so the matrix is left as we found it
+            j = self.left[r]
+            while j != r:
+                self.uncover(self.column[j])
+                j = self.left[j]
+            if found:
+                break
+            chosen.pop()
+            r = down[r]
+        self.uncover(best)
+        return found
+
+    def solve(self, bo):
+        """
+        Solves a Sudoku board in place.
+        :param bo: 2D list representing the Sudoku board (its size must
+                   match the matrix)
+        :return: bool (True if solved, False otherwise)
+        """
+        size = self.size
+        if len(bo) != size:
+            raise ValueError("matrix is for %dx%d boards" % (size, size))
+
+        givens = []
+        used = set()
+        ok = True
+        for i in range(size):
+            for j in range(size):
+                num = bo[i][j]
+                if num == 0:
+                    continue
+                node = self.row_start[(i * size + j) * size + num - 1]
+                columns = [self.column[node + k] for k in range(4)]
+                if used.intersection(columns):
+                    ok = False  # The givens repeat a digit in a unit
+                    break
+                used.update(columns)
+                self.select(node)
+                givens.append(node)
+            if not ok:
+                break
+
+        chosen = []
+        if ok and self.search(chosen):
+            for node in chosen:
+                cell, num = divmod(self.row_id[node], size)
+                bo[cell // size][cell % size] = num + 1
+        else:
+            ok = False
+
+        for node in reversed(givens):
+            self.deselect(node)
+        return ok
+
+
+def solve(bo, matrix=None):
+    """
+    Solves the Sudoku board with Dancing Links.
+    :param bo: 2D list representing the Sudoku board
+    :param matrix: CoverMatrix to reuse (a new one is built if omitted)
+    :return: bool (True if solved, False otherwise)
+    """
+    if matrix is None:
+        matrix = CoverMatrix(box_size(bo))
+    return matrix.solve(bo)
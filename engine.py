@@ -0,0 +1,416 @@
+"""
+Bitmask Sudoku engine.
+
+Row, column and box occupancy are kept as integer bitmasks (bit ``d - 1`` set
+when digit ``d`` is present), so the legal digits for a cell are found with a
+couple of bitwise operations instead of rescanning the board like
+``solver.valid`` does.
+
+Before every branching decision the engine fills naked singles (cells with one
+candidate) and hidden singles (digits with one possible cell in a row, column
+or box), so most easy and medium puzzles are solved without guessing.
+
+Any n²×n² board works (9x9, 16x16, 25x25, ...); Python integers hold the
+n²-bit masks directly.
+
+``solve_limited`` bounds a search by nodes and/or time and hands back where it
+stopped, so a runaway search can be cut off cleanly and picked up later.
+"""
+
+import collections
+import time
+
+from solver import box_size
+
+SOLVED = "solved"  # SolveResult statuses
+UNSOLVABLE = "unsolvable"
+BUDGET_EXCEEDED = "budget exceeded"
+CHECK_NODES = 1000  # Nodes between deadline checks
+
+
+class Engine:
+    """
+    Search state for one board.
+
+    The empty cells live in ``empties``; the first ``filled`` of them have been
+    given a digit, in the order they were placed, so undoing back to an
+    earlier ``filled`` value is a matter of walking that prefix backwards.
+
+    :param bo: 2D list representing the Sudoku board (solved in place)
+    :param select: str ("mrv" branches on the most constrained cell,
+                   "first" on the first empty cell in row-major order)
+    :param propagate: bool (fill naked and hidden singles before branching)
+    """
+
+    def __init__(self, bo, select="mrv", propagate=True):
+        if select not in ("mrv", "first"):
+            raise ValueError("select must be 'mrv' or 'first'")
+        self.bo = bo
+        self.select = select
+        self.propagating = propagate
+        self.n = n = box_size(bo)
+        self.size = size = n * n
+        self.all_digits = (1 << size) - 1
+        self.rows = [0] * size
+        self.cols = [0] * size
+        self.boxes = [0] * size
+        self.empties = []
+        self.filled = 0
+        self.consistent = True  # False when the givens repeat a digit in a unit
+
+        for i in range(size):
+            for j in range(size):
+                num = bo[i][j]
+                if num == 0:
+                    self.empties.append((i, j, (i // n) * n + j // n))
+                elif not 0 < num <= size:
+                    raise ValueError("cell (%d, %d) holds %r" % (i, j, num))
+                else:
+                    bit = 1 << (num - 1)
+                    box = (i // n) * n + j // n
+                    if (self.rows[i] | self.cols[j] | self.boxes[box]) & bit:
+                        self.consistent = False
+                    self.rows[i] |= bit
+                    self.cols[j] |= bit
+                    self.boxes[box] |= bit
+
+        # Search stack, one level per open branch point (see ``run``)
+        depth = len(self.empties) + 1
+        self.stack_mark = [0] * depth
+        self.stack_pos = [0] * depth
+        self.stack_free = [0] * depth
+        self.level = -1
+        self.entering = True
+        self.nodes = 0  # Search nodes expanded so far
+
+        # Scratch tallies for ``propagate``
+        self.tallies = [[0] * size for _ in range(6)]
+        self.zeros = [0] * size
+
+    def candidates(self, row, col):
+        """
+        Returns the legal digits for a cell as a bitmask.
+        :param row: int
+        :param col: int
+        :return: int (bit d - 1 set when digit d is legal)
+        """
+        box = (row // self.n) * self.n + col // self.n
+        return self.all_digits & ~(self.rows[row] | self.cols[col] | self.boxes[box])
+
+    def assign(self, i, num):
+        """
+        Places a digit in the empty cell ``empties[i]`` and moves that cell to
+        the end of the filled prefix.
+        :param i: int (index into empties, at or after ``filled``)
+        :param num: int (digit to place)
+        :return: None
+        """
+        empties = self.empties
+        k = self.filled
+        row, col, box = cell = empties[i]
+        empties[i] = empties[k]
+        empties[k] = cell
+        self.filled = k + 1
+
+        bit = 1 << (num - 1)
+        self.bo[row][col] = num
+        self.rows[row] |= bit
+        self.cols[col] |= bit
+        self.boxes[box] |= bit
+
+    def backtrack(self, mark):
+        """
+        Clears every digit placed since ``filled`` was ``mark``.
+        :param mark: int
+        :return: None
+        """
+        bo = self.bo
+        empties = self.empties
+        for k in range(self.filled - 1, mark - 1, -1):
+            row, col, box = empties[k]
+            bit = ~(1 << (bo[row][col] - 1))
+            bo[row][col] = 0
+            self.rows[row] &= bit
+            self.cols[col] &= bit
+            self.boxes[box] &= bit
+        self.filled = mark
+
+    def propagate(self):
+        """
+        Fills naked and hidden singles until neither rule applies.
+        :return: bool (False if the board has reached a contradiction)
+        """
+        empties = self.empties
+        rows, cols, boxes = self.rows, self.cols, self.boxes
+
+        all_digits = self.all_digits
+        zeros = self.zeros
+        row_once, row_twice, col_once, col_twice, box_once, box_twice = self.tallies
+
+        while self.filled < len(empties):
+            for tally in self.tallies:
+                tally[:] = zeros
+            progress = False
+
+            # Naked singles; also tally where each digit can still go
+            for i in range(self.filled, len(empties)):
+                row, col, box = empties[i]
+                free = all_digits & ~(rows[row] | cols[col] | boxes[box])
+                if not free:
+                    return False
+                if not free & (free - 1):
+                    self.assign(i, free.bit_length())
+                    progress = True
+                elif not progress:
+                    row_twice[row] |= row_once[row] & free
+                    row_once[row] |= free
+                    col_twice[col] |= col_once[col] & free
+                    col_once[col] |= free
+                    box_twice[box] |= box_once[box] & free
+                    box_once[box] |= free
+
+            if progress:
+                continue  # The tallies are stale, recount
+
+            # Every digit must have a home in every unit
+            for u in range(self.size):
+                if (row_once[u] | rows[u]) != all_digits:
+                    return False
+                if (col_once[u] | cols[u]) != all_digits:
+                    return False
+                if (box_once[u] | boxes[u]) != all_digits:
+                    return False
+
+            # Hidden singles
+            for u in range(self.size):
+                row_once[u] &= ~row_twice[u]
+                col_once[u] &= ~col_twice[u]
+                box_once[u] &= ~box_twice[u]
+
+            for i in range(self.filled, len(empties)):
+                row, col, box = empties[i]
+                free = all_digits & ~(rows[row] | cols[col] | boxes[box])
+                forced = free & (row_once[row] | col_once[col] | box_once[box])
+                if forced:
+                    if forced & (forced - 1):
+                        return False  # Two digits need this one cell
+                    self.assign(i, forced.bit_length())
+                    progress = True
+
+            if not progress:
+                break
+
+        return True
+
+    def pick(self):
+        """
+        Moves the empty cell with the fewest candidates to ``empties[filled]``.
+        Only the cells that are still empty are looked at.
+        :return: int (candidate bitmask of the chosen cell, 0 on a dead end)
+        """
+        empties = self.empties
+        rows, cols, boxes = self.rows, self.cols, self.boxes
+        all_digits = self.all_digits
+        depth = self.filled
+        best = depth
+        best_free = 0
+        best_count = self.size + 1
+
+        for i in range(depth, len(empties)):
+            row, col, box = empties[i]
+            free = all_digits & ~(rows[row] | cols[col] | boxes[box])
+            count = free.bit_count()
+            if count < best_count:
+                best, best_free, best_count = i, free, count
+                if count <= 1:
+                    break  # Forced move or dead end, no need to look further
+
+        empties[depth], empties[best] = empties[best], empties[depth]
+        return best_free
+
+    def run(self, max_nodes=None):
+        """
+        Runs the search from wherever it last stopped.
+
+        The search is a loop over an explicit stack: level ``k`` holds the
+        ``filled`` count before the node propagated (``stack_mark``), the
+        position of the cell it branched on (``stack_pos``) and the digits it
+        has yet to try there (``stack_free``). Calling ``run`` again after it
+        returns None picks up where it paused; calling it again after a
+        solution moves on to the next one.
+
+        :param max_nodes: int (pause after expanding this many nodes)
+        :return: bool or None (True if solved, False if there is no (further)
+                 solution, None if paused)
+        """
+        if not self.consistent:
+            return False
+
+        empties = self.empties
+        total = len(empties)
+        all_digits = self.all_digits
+        rows, cols, boxes = self.rows, self.cols, self.boxes
+        stack_mark, stack_pos, stack_free = self.stack_mark, self.stack_pos, self.stack_free
+        level = self.level
+        stop = None if max_nodes is None else self.nodes + max_nodes
+
+        while True:
+            if self.entering:
+                if self.nodes == stop:
+                    self.level = level
+                    return None
+                self.nodes += 1
+
+                mark = self.filled
+                if self.propagating and not self.propagate():
+                    self.backtrack(mark)  # Dead end, fall through to the next digit
+                elif self.filled == total:
+                    self.level = level
+                    self.entering = False
+                    return True  # Board is solved
+                else:
+                    depth = self.filled
+                    if self.select == "mrv":
+                        free = self.pick()
+                    else:
+                        row, col, box = empties[depth]
+                        free = all_digits & ~(rows[row] | cols[col] | boxes[box])
+                    level += 1
+                    stack_mark[level] = mark
+                    stack_pos[level] = depth
+                    stack_free[level] = free
+                self.entering = False
+
+            if level < 0:
+                self.backtrack(0)
+                self.level = level
+                return False  # Search space exhausted
+
+            depth = stack_pos[level]
+            self.backtrack(depth)  # Undo the previous attempt at this level
+            free = stack_free[level]
+            if not free:
+                self.backtrack(stack_mark[level])
+                level -= 1
+                continue
+
+            bit = free & -free  # Lowest digit first, like solver.solve
+            stack_free[level] = free ^ bit
+            self.assign(depth, bit.bit_length())
+            self.entering = True
+
+    def search(self):
+        """
+        Propagates, then backtracks over the remaining empty cells.
+        :return: bool (True if solved, False otherwise)
+        """
+        return self.run()
+
+    def reset(self):
+        """
+        Clears everything the search has placed and rewinds it to the start.
+        :return: None
+        """
+        self.backtrack(0)
+        self.level = -1
+        self.entering = True
+
+
+def solve(bo, select="mrv", propagate=True):
+    """
+    Solves the Sudoku board using bitmask backtracking.
+    :param bo: 2D list representing the Sudoku board
+    :param select: str ("mrv" or "first", see ``Engine``)
+    :param propagate: bool (fill singles before each branch, see ``Engine``)
+    :return: bool (True if solved, False otherwise, including when the
+             givens already break the rules)
+    """
+    return Engine(bo, select, propagate).search()
+
+
+def count_solutions(bo, limit=None):
+    """
+    Counts the solutions of a board, stopping as soon as ``limit`` is reached.
+    The board is searched in place and handed back unchanged.
+    :param bo: 2D list representing the Sudoku board
+    :param limit: int (stop counting here, None to count them all)
+    :return: int
+    """
+    engine = Engine(bo)
+    count = 0
+    try:
+        while (limit is None or count < limit) and engine.run():
+            count += 1
+    finally:
+        engine.reset()
+    return count
+
+
+def iter_solutions(bo):
+    """
+    Yields the solutions of a board one at a time.
+    The board is searched in place and handed back unchanged once the
+    generator is exhausted or closed.
+    :param bo: 2D list representing the Sudoku board
+    :return: generator of 2D lists (a copy of each solution)
+    """
+    engine = Engine(bo)
+    try:
+        while engine.run():
+            yield [row[:] for row in bo]
+    finally:
+        engine.reset()
+
+
+class SolveResult(collections.namedtuple("SolveResult", "status nodes board search")):
+    """
+    Result of ``solve_limited``.
+    status: str (SOLVED, UNSOLVABLE or BUDGET_EXCEEDED)
+    nodes: int (search nodes expanded so far, counting every resume)
+    board: 2D list (copy of the board where the search left it: the solution,
+           the givens if there is none, or the partial state reached)
+    search: Engine (paused search to resume, None unless the budget ran out)
+    """
+
+    __slots__ = ()
+
+    def resume(self, max_nodes=None, timeout=None, deadline=None):
+        """
+        Carries on a search that ran out of budget, with a fresh budget.
+        :return: SolveResult (this one if there is nothing left to resume)
+        """
+        if self.search is None:
+            return self
+        return solve_limited(self.search, max_nodes, timeout, deadline)
+
+
+def solve_limited(bo, max_nodes=None, timeout=None, deadline=None):
+    """
+    Solves a board, stopping cleanly once a node or time budget runs out.
+    The time limits are checked before starting and then every CHECK_NODES
+    nodes.
+    :param bo: 2D list representing the Sudoku board (solved in place), or
+               the Engine of an earlier result to carry on with
+    :param max_nodes: int (most nodes to expand in this call)
+    :param timeout: float (seconds to spend in this call)
+    :param deadline: float (time.monotonic() value to stop at)
+    :return: SolveResult
+    """
+    search = bo if isinstance(bo, Engine) else Engine(bo)
+    if timeout is not None:
+        end = time.monotonic() + timeout
+        deadline = end if deadline is None else min(deadline, end)
+    stop = None if max_nodes is None else search.nodes + max_nodes
+    if deadline is not None and time.monotonic() >= deadline:
+        return SolveResult(BUDGET_EXCEEDED, search.nodes, [row[:] for row in search.bo], search)
+
+    while True:
+        budget = None if stop is None else stop - search.nodes
+        if deadline is not None:
+            budget = CHECK_NODES if budget is None else min(budget, CHECK_NODES)
+        result = search.run(budget)
+        if result is None:
+            if (stop is None or search.nodes < stop) and (deadline is None or time.monotonic() < deadline):
+                continue  # Only paused to look at the clock
+            return SolveResult(BUDGET_EXCEEDED, search.nodes, [row[:] for row in search.bo], search)
+        return SolveResult(SOLVED if result else UNSOLVABLE, search.nodes, [row[:] for row in search.bo], None)
@@ -0,0 +1,179 @@
+"""
+Fast puzzle generator.
+
+Complete grids are made by shuffling a fixed seed grid with transforms that
+keep any grid valid: relabelling the digits, permuting the bands and the rows
+inside each band, permuting the stacks and the columns inside each stack, and
+transposing. That costs a few list operations instead of a search.
+
+Holes are then dug one cell at a time. Removing a clue can only add
+solutions, so a cell that can't be removed once never needs to be tried
+again; every cell is tried at most once. The uniqueness test doesn't count
+solutions from scratch: the full grid is already known to be a solution, so
+it only looks for one that puts a different digit in the cell just emptied.
+"""
+
+import random
+
+from engine import Engine
+from solver import box_size
+
+
+def seed_grid(n=3):
+    """
+    Builds a fixed valid grid to shuffle from.
+    :param n: int (box size, 3 for 9x9)
+    :return: 2D list
+    """
+    size = n * n
+    return [[(n * (r % n) + r // n + c) % size + 1 for c in range(size)] for r in range(size)]
+
+
+def _line_order(n, rng):
+    """
+    Shuffles the bands (or stacks), then the lines inside each of them.
+    :return: list of row (or column) indexes
+    """
+    return [band * n + line for band in rng.sample(range(n), n) for line in rng.sample(range(n), n)]
+
+
+def random_grid(n=3, rng=random):
+    """
+    Makes a random complete grid from the seed grid.
+    :param n: int (box size, 3 for 9x9)
+    :param rng: random.Random (or the random module)
+    :return: 2D list
+    """
+    size = n * n
+    seed = seed_grid(n)
+    digits = [0] + rng.sample(range(1, size + 1), size)
+    rows = _line_order(n, rng)
+    cols = _line_order(n, rng)
+    grid = [[digits[seed[r][c]] for c in cols] for r in rows]
+    if rng.random() < 0.5:
+        grid = [list(col) for col in zip(*grid)]
+    return grid
+
+
+def _solvable_with(puzzle, row, col, digits):
+    """
+    Checks whether the puzzle has a solution using one of ``digits`` at (row, col).
+    :param puzzle: 2D list (cell (row, col) must be empty; left unchanged)
+    :param digits: int (bitmask of digits to try)
+    :return: bool
+    """
+    while digits:
+        bit = digits & -digits
+        digits ^= bit
+        puzzle[row][col] = bit.bit_length()
+        engine = Engine(puzzle)
+        found = engine.run()
+        engine.reset()
+        puzzle[row][col] = 0
+        if found:
+            return True
+    return False
+
+
+def _hidden_single(puzzle, rows, cols, boxes, n, row, col, bit):
+    """
+    Checks whether the digit ``bit`` has nowhere else to go in the row, column
+    or box of the empty cell (row, col), so the puzzle forces it there.
+    :return: bool
+    """
+    size = n * n
+    top, left = row - row % n, col - col % n
+
+    for c in range(size):
+        if c != col and not puzzle[row][c] and not (cols[c] | boxes[top + c // n]) & bit:
+            break
+    else:
+        return True
+
+    for r in range(size):
+        if r != row and not puzzle[r][col] and not (rows[r] | boxes[r // n * n + col // n]) & bit:
+            break
+    else:
+        return True
+
+    for r in range(top, top + n):
+        for c in range(left, left + n):
+            if (r, c) != (row, col) and not puzzle[r][c] and not (rows[r] | cols[c]) & bit:
+                return False
+    return True
+
+
+def has_other_solution(puzzle, row, col, num):
+    """
+    Checks whether a puzzle that has ``num`` as a solution value at (row, col)
+    can also be solved with another digit there.
+    :param puzzle: 2D list (cell (row, col) must be empty; left unchanged)
+    :param row: int
+    :param col: int
+    :param num: int (the digit the known solution has in that cell)
+    :return: bool
+    """
+    others = Engine(puzzle).candidates(row, col) & ~(1 << (num - 1))
+    return _solvable_with(puzzle, row, col, others)
+
+
+def dig(grid, clues=0, rng=random):
+    """
+    Removes clues from a complete grid while the solution stays unique.
+    :param grid: 2D list (a complete grid, left unchanged)
+    :param clues: int (stop once only this many clues are left)
+    :param rng: random.Random (or the random module)
+    :return: 2D list (the puzzle)
+    """
+    n = box_size(grid)
+    size = len(grid)
+    all_digits = (1 << size) - 1
+    puzzle = [row[:] for row in grid]
+    cells = list(range(size * size))
+    rng.shuffle(cells)
+    remaining = len(cells)
+
+    # Occupancy masks of the puzzle, kept up to date as clues come out, so a
+    # cell that is a naked or hidden single is cleared without a search
+    rows = [all_digits] * size
+    cols = [all_digits] * size
+    boxes = [all_digits] * size
+
+    for cell in cells:
+        if remaining <= clues:
+            break
+        row, col = divmod(cell, size)
+        box = (row // n) * n + col // n
+        num = puzzle[row][col]
+        bit = 1 << (num - 1)
+
+        puzzle[row][col] = 0
+        rows[row] ^= bit
+        cols[col] ^= bit
+        boxes[box] ^= bit
+        others = all_digits & ~(rows[row] | cols[col] | boxes[box] | bit)
+
+        if others and not _hidden_single(puzzle, rows, cols, boxes, n, row, col, bit) \
+                and _solvable_with(puzzle, row, col, others):
+            # Needed for uniqueness, and always will be
+            puzzle[row][col] = num
+            rows[row] |= bit
+            cols[col] |= bit
+            boxes[box] |= bit
+        else:
+            remaining -= 1
+
+    return puzzle
+
+
+def generate(n=3, clues=0, rng=random):
+    """
+    Generates a puzzle with a unique solution.
+    :param n: int (box size, 3 for 9x9)
+    :param clues: int (stop digging once only this many clues are left;
+                  0 digs until no clue can be removed)
+    :param rng: random.Random (or the random module)
+    :return: tuple (puzzle, solution) of 2D lists
+    """
+    solution = random_grid(n, rng)
+    return dig(solution, clues, rng), solution
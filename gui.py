@@ -1,11 +1,25 @@
+import os
 import pygame
 import time
 import random
+
+import render_cache
+import solver
+from animation import SolveAnimation
+from conflict_index import ConflictIndex
+from puzzle_bank import PuzzleBank
+from stats import SearchStats
 pygame.font.init()
 
+# Pregenerated puzzles (build with puzzle_bank.py); generated on the fly if missing
+BANK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "puzzles.bank")
+
+DIGITS = [str(i) for i in range(10)]
+
 class Cube:
     rows = 9
     cols = 9
+    __slots__ = ("value", "temp", "row", "col", "width", "height", "selected", "strike")
 
     def __init__(self, value, row, col, width, height):
         self.value = value
@@ -18,16 +32,16 @@ class Cube:
         self.strike = False  # This will indicate if the cube is invalid
 
     def draw(self, win):
-        fnt = pygame.font.SysFont("comicsans", 40)
+        fnt = render_cache.sys_font("comicsans", 40)
         gap = self.width / 9
         x = self.col * gap
         y = self.row * gap
 
         if self.temp != 0 and self.value == 0:
-            text = fnt.render(str(self.temp), 1, (128, 128, 128))
+            text = render_cache.text(fnt, DIGITS[self.temp], (128, 128, 128))
             win.blit(text, (x + 5, y + 5))
         elif self.value != 0:
-            text = fnt.render(str(self.value), 1, (0, 0, 0))
+            text = render_cache.text(fnt, DIGITS[self.value], (0, 0, 0))
             win.blit(text, (x + (gap / 2 - text.get_width() / 2), y + (gap / 2 - text.get_height() / 2)))
 
         if self.selected:
@@ -47,14 +61,15 @@ class Cube:
         self.strike = strike  # Set whether the cube has a strike
 
     def draw_change(self, win, g=True):
-        fnt = pygame.font.SysFont("comicsans", 40)
+        fnt = render_cache.sys_font("comicsans", 40)
         gap = self.width / 9
         x = self.col * gap
         y = self.row * gap
 
         pygame.draw.rect(win, (255, 255, 255), (x, y, gap, gap), 0)
-        text = fnt.render(str(self.value), 1, (0, 0, 0))
-        win.blit(text, (x + (gap / 2 - text.get_width() / 2), y + (gap / 2 - text.get_height() / 2)))
+        if self.value != 0:
+            text = render_cache.text(fnt, DIGITS[self.value], (0, 0, 0))
+            win.blit(text, (x + (gap / 2 - text.get_width() / 2), y + (gap / 2 - text.get_height() / 2)))
         if g:
             pygame.draw.rect(win, (0, 255, 0), (x, y, gap, gap), 3)
         else:
@@ -70,19 +85,38 @@ class Grid:
         self.cubes = [[Cube(0, i, j, width, height) for j in range(cols)] for i in range(rows)]
         self.model = None
         self.selected = None
+        self.dirty = set()  # Cells to redraw on the next frame
+        self.redraw_all = True  # Set when the whole window needs redrawing
+        self.changed = None  # (row, col, placed) of the last solver step shown
+        # Render the digit glyphs once so drawing a frame only blits them
+        render_cache.prerender(render_cache.sys_font("comicsans", 40), DIGITS, [(0, 0, 0), (128, 128, 128)])
         self.generate_board()  # Generate a random board upon initialization
 
     def generate_board(self):
+        try:
+            with PuzzleBank(BANK_PATH) as bank:
+                puzzle = bank.random("Medium")[0] if bank.count("Medium") else None
+        except (OSError, ValueError):
+            puzzle = None  # Missing or unusable, generate one instead
+        if puzzle is not None:
+            self.board = puzzle
+            self.update_cubes()
+            self.index = ConflictIndex(self.board)
+            return
+
         self.board = [[0 for _ in range(9)] for _ in range(9)]
         self.fill_board(self.board)
         self.update_cubes()
         self.remove_numbers()  # Remove some numbers to create a puzzle
+        self.index = ConflictIndex(self.board)  # Digit counts per row, column and box for manual input
 
     def update_cubes(self):
         """Update the cube values based on the generated board."""
         for i in range(self.rows):
             for j in range(self.cols):
-                self.cubes[i][j].set(self.board[i][j])
+                if self.cubes[i][j].value != self.board[i][j]:
+                    self.cubes[i][j].set(self.board[i][j])
+                    self.dirty.add((i, j))
 
     def fill_board(self, board):
         """Fill the board using a backtracking algorithm."""
@@ -91,8 +125,9 @@ class Grid:
             return True  # Board is complete
         row, col = empty_pos
 
-        random.shuffle(list(range(1, 10)))  # Shuffle to introduce randomness
-        for num in range(1, 10):
+        nums = list(range(1, 10))
+        random.shuffle(nums)  # Shuffle to introduce randomness
+        for num in nums:
             if self.valid(board, num, (row, col)):
                 board[row][col] = num
                 if self.fill_board(board):
@@ -145,8 +180,8 @@ class Grid:
             self.board[row][col] = 0  # Remove the number (set to 0)
         self.update_cubes()
 
-    def draw(self):
-        """Draw the Sudoku grid and cubes."""
+    def draw_lines(self):
+        """Draw the grid lines."""
         gap = self.width / 9
         for i in range(self.rows + 1):
             if i % 3 == 0 and i != 0:
@@ -156,17 +191,53 @@ class Grid:
             pygame.draw.line(self.win, (0, 0, 0), (0, i * gap), (self.width, i * gap), thick)
             pygame.draw.line(self.win, (0, 0, 0), (i * gap, 0), (i * gap, self.height), thick)
 
+    def draw(self):
+        """Draw the Sudoku grid and cubes."""
+        self.draw_lines()
         for i in range(self.rows):
             for j in range(self.cols):
                 self.cubes[i][j].draw(self.win)
+        if self.changed:
+            row, col, placed = self.changed
+            self.cubes[row][col].draw_change(self.win, placed)
+        self.dirty.clear()
+        self.redraw_all = False
+
+    def cell_rect(self, row, col):
+        """Screen rectangle of a cell, grown to cover the grid lines around it."""
+        gap = self.width / 9
+        rect = pygame.Rect(int(col * gap) - 2, int(row * gap) - 2, int(gap) + 5, int(gap) + 5)
+        return rect.clip(pygame.Rect(0, 0, self.width, self.height))
+
+    def draw_dirty(self):
+        """Redraw only the cells that changed since the last frame and return their rectangles."""
+        rects = []
+        for row, col in self.dirty:
+            rect = self.cell_rect(row, col)
+            self.win.set_clip(rect)
+            self.win.fill((255, 255, 255), rect)
+            self.draw_lines()
+            # Neighbouring cubes can reach into the rectangle too
+            for i in range(max(row - 1, 0), min(row + 2, self.rows)):
+                for j in range(max(col - 1, 0), min(col + 2, self.cols)):
+                    self.cubes[i][j].draw(self.win)
+            rects.append(rect)
+        self.win.set_clip(None)
+        self.dirty.clear()
+        if self.changed:
+            row, col, placed = self.changed
+            self.cubes[row][col].draw_change(self.win, placed)
+            rects.append(self.cell_rect(row, col))
+        return rects
 
     def select(self, row, col):
         """Select a cell in the grid."""
-        for i in range(self.rows):
-            for j in range(self.cols):
-                self.cubes[i][j].selected = False
+        if self.selected:
+            self.cubes[self.selected[0]][self.selected[1]].selected = False
+            self.dirty.add(self.selected)
         self.cubes[row][col].selected = True
         self.selected = (row, col)
+        self.dirty.add(self.selected)
 
     def click(self, pos):
         """Handle mouse click events."""
@@ -183,56 +254,39 @@ class Grid:
         row, col = self.selected
         if self.cubes[row][col].value == 0:
             self.cubes[row][col].set_temp(0)
+            self.dirty.add((row, col))
 
     def is_finished(self):
         """Check if the board is complete."""
-        for i in range(self.rows):
-            for j in range(self.cols):
-                if self.cubes[i][j].value == 0:
-                    return False
-        return True
+        return self.index.is_full()
 
-    def solve_gui(self):
-        """Solve the board automatically with visual updates."""
-        find = self.find_empty(self.board)
-        if not find:
-            return True
-        else:
-            row, col = find
-
-        for i in range(1, 10):
-            if self.valid(self.board, i, (row, col)):
-                self.board[row][col] = i
-                self.cubes[row][col].set(i)
-                self.cubes[row][col].draw_change(self.win, True)
-                self.update_cubes()
-                pygame.display.update()
-                pygame.time.delay(100)
-
-                if self.solve_gui():
-                    return True
-
-                self.board[row][col] = 0
-                self.cubes[row][col].set(0)
-                self.update_cubes()
-                self.cubes[row][col].draw_change(self.win, False)
-                pygame.display.update()
-                pygame.time.delay(100)
+    def solve_gui(self, stats=None, speed=10):
+        """Start solving the board with visual updates; the main loop plays it back frame by frame."""
+        return SolveAnimation(self.board, speed, stats=stats)
 
-        return False
+    def show_steps(self, steps):
+        """Bring the cubes up to date after some solver steps, outlining the last one."""
+        if not steps:
+            return
+        self.update_cubes()
+        if self.changed:
+            self.dirty.add(self.changed[:2])
+        event, row, col, _ = steps[-1]
+        self.changed = (row, col, event == solver.PLACE)
 
     def manual_input(self, num):
         """Allow the user to input a number manually."""
         if self.selected:
             row, col = self.selected
             if self.board[row][col] == 0:
-                if self.valid(self.board, num, (row, col)):
+                if self.index.can_place(row, col, num):
                     self.board[row][col] = num
+                    self.index.set(row, col, num)
                     self.cubes[row][col].set(num)
                     self.cubes[row][col].set_strike(False)  # Clear strike if the input is valid
                 else:
                     self.cubes[row][col].set_strike(True)  # Strike the cell if the input is invalid
-                self.update_cubes()
+                self.dirty.add((row, col))
 
 # Initialize pygame
 pygame.init()
@@ -245,24 +299,60 @@ pygame.display.set_caption("Sudoku Solver")
 # Create a grid instance
 grid = Grid(9, 9, width, height, win)
 
-# Main game loop
+# Main game loop: redraw only what changed, then sleep until the next event.
+# While a solve plays, SPACE pauses, UP/DOWN change speed, ENTER jumps to the
+# solution and ESCAPE cancels.
+clock = pygame.time.Clock()
+animation = None
+stats = None
 running = True
 while running:
-    win.fill((255, 255, 255))  # Fill the screen with white
-
-    grid.draw()  # Draw the grid and cubes
-    pygame.display.update()  # Update the display
-
-    # Event handling
-    for event in pygame.event.get():
+    if animation:
+        grid.show_steps(animation.advance())
+        if not animation.running:
+            grid.update_cubes()
+            grid.index = ConflictIndex(grid.board)
+            grid.changed = None
+            grid.redraw_all = True
+            pygame.display.set_caption("Sudoku Solver - " + stats.summary())
+            animation = None
+
+    if grid.redraw_all:
+        win.fill((255, 255, 255))  # Fill the screen with white
+        grid.draw()  # Draw the grid and cubes
+        pygame.display.update()  # Update the display
+    elif grid.dirty:
+        pygame.display.update(grid.draw_dirty())
+
+    # Event handling; keep polling while a solve is playing
+    if animation and not animation.paused:
+        events = pygame.event.get()
+    else:
+        events = [pygame.event.wait()] + pygame.event.get()
+    for event in events:
         if event.type == pygame.QUIT:
             running = False
 
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_SPACE:  # Spacebar to start solving
-                grid.solve_gui()
+        if event.type == pygame.VIDEOEXPOSE:
+            grid.redraw_all = True
 
-            if event.key in [pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4, pygame.K_5, pygame.K_6, pygame.K_7, pygame.K_8, pygame.K_9]:
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_SPACE:  # Spacebar to start solving, or pause and resume
+                if animation:
+                    animation.pause()
+                else:
+                    stats = SearchStats()
+                    animation = grid.solve_gui(stats)
+            elif animation and event.key == pygame.K_UP:
+                animation.faster()
+            elif animation and event.key == pygame.K_DOWN:
+                animation.slower()
+            elif animation and event.key == pygame.K_RETURN:
+                animation.finish()
+            elif animation and event.key == pygame.K_ESCAPE:
+                animation.cancel()
+
+            if not animation and event.key in [pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4, pygame.K_5, pygame.K_6, pygame.K_7, pygame.K_8, pygame.K_9]:
                 num = event.key - pygame.K_1 + 1  # Get the number based on the key press
                 grid.manual_input(num)
 
@@ -273,6 +363,6 @@ while running:
                 row, col = clicked
                 grid.select(row, col)
 
-    pygame.time.Clock().tick(60)  # Frame rate
+    clock.tick(60)  # Frame rate cap
 
 pygame.quit()
@@ -0,0 +1,199 @@
+"""
+Parallel search of a single puzzle.
+
+``batch`` spreads many puzzles over many processes, which doesn't help when
+one hard puzzle is the bottleneck. Here one puzzle's search tree is split up
+instead:
+
+- The top of the tree is expanded breadth first (propagating singles at every
+  node) until there are a few open subproblems per worker.
+- Workers search a subproblem for a slice of nodes at a time. A subproblem
+  still going at the end of its slice gives away the untried digits of its
+  shallowest open branch point as new subproblems, and goes back in the
+  queue itself (the ``Engine`` is picklable, so it resumes where it stopped).
+  Big subtrees are split up this way while they run, and idle workers pick
+  the pieces off the shared queue.
+- In solving mode the pool is terminated as soon as any worker finds a
+  solution; in counting mode the subproblems' counts are added up.
+"""
+
+import multiprocessing
+import os
+import queue
+
+import engine
+
+SLICE_NODES = 10000  # Nodes a worker searches before handing a subproblem back
+
+
+def _digits(free):
+    while free:
+        bit = free & -free
+        free ^= bit
+        yield bit.bit_length()
+
+
+def split(bo, target):
+    """
+    Expands the top of the search tree breadth first until there are at least
+    ``target`` subproblems or nothing is left to expand. Subproblems that
+    propagation shows to be dead ends are dropped, so between them the
+    returned boards have exactly the solutions of ``bo``.
+    :param bo: 2D list representing the Sudoku board (left unchanged)
+    :param target: int
+    :return: list of 2D lists
+    """
+    frontier = [[row[:] for row in bo]]
+    while len(frontier) < target:
+        expanded = []
+        grew = False
+        for board in frontier:
+            search = engine.Engine(board)
+            if not search.consistent or not search.propagate():
+                continue  # No solutions down here
+            if search.filled == len(search.empties):
+                expanded.append(board)  # Already solved
+                continue
+            free = search.pick()
+            row, col, _ = search.empties[search.filled]
+            for num in _digits(free):
+                child = [r[:] for r in board]
+                child[row][col] = num
+                expanded.append(child)
+            grew = True
+        frontier = expanded
+        if not grew:
+            break
+    return frontier
+
+
+def _donate(search):
+    """
+    Takes the untried digits off the shallowest open branch point of a paused
+    search and turns them into boards of their own.
+    :param search: Engine (paused by run(max_nodes))
+    :return: list of 2D lists
+    """
+    for level in range(search.level + 1):
+        free = search.stack_free[level]
+        if not free:
+            continue
+        search.stack_free[level] = 0
+        pos = search.stack_pos[level]
+        board = [row[:] for row in search.bo]
+        for row, col, _ in search.empties[pos:search.filled]:
+            board[row][col] = 0  # Back to the board as it was at that level
+        row, col, _ = search.empties[pos]
+        boards = []
+        for num in _digits(free):
+            child = [r[:] for r in board]
+            child[row][col] = num
+            boards.append(child)
+        return boards
+    return []
+
+
+def _work(job):
+    """
+    Worker entry point: searches one subproblem for up to a slice of nodes.
+    :param job: tuple (Engine to resume or board to start on, counting,
+                slice_nodes, limit)
+    :return: tuple (solutions found, solved board or None, Engine to resume
+             or None if finished, list of donated boards)
+    """
+    task, counting, slice_nodes, limit = job
+    search = task if isinstance(task, engine.Engine) else engine.Engine(task)
+    found = 0
+    stop = search.nodes + slice_nodes
+    while True:
+        result = search.run(max(stop - search.nodes, 0))
+        if result is None:
+            return found, None, search, _donate(search)
+        if not result:
+            return found, None, None, []
+        found += 1
+        if not counting:
+            return found, [row[:] for row in search.bo], None, []
+        if limit is not None and found >= limit:
+            return found, None, None, []
+
+
+def _run(bo, counting, limit, workers, target, slice_nodes):
+    """
+    Farms the subproblems of a board out to a pool and gathers the results.
+    :return: tuple (solutions counted, solved board or None)
+    """
+    results = queue.SimpleQueue()
+    total = 0
+    solution = None
+    with multiprocessing.Pool(workers) as pool:
+        pending = 0
+
+        def submit(task):
+            nonlocal pending
+            pending += 1
+            pool.apply_async(_work, ((task, counting, slice_nodes, limit),),
+                             callback=results.put, error_callback=results.put)
+
+        for board in split(bo, target or workers * 4):
+            submit(board)
+
+        while pending:
+            result = results.get()
+            pending -= 1
+            if isinstance(result, BaseException):
+                raise result
+            found, board, search, donated = result
+            if board is not None:
+                solution = board
+                break
+            total += found
+            if limit is not None and total >= limit:
+                total = limit
+                break
+            for task in donated:
+                submit(task)
+            if search is not None:
+                submit(search)
+    # Leaving the with block terminates the pool, cancelling any work in flight
+    return total, solution
+
+
+def solve(bo, workers=None, target=None, slice_nodes=SLICE_NODES):
+    """
+    Solves one board with a pool of worker processes.
+    :param bo: 2D list representing the Sudoku board (solved in place)
+    :param workers: int (processes to use, defaults to the CPU count;
+                    1 solves in the calling process)
+    :param target: int (subproblems to split into up front, defaults to four
+                   per worker)
+    :param slice_nodes: int (nodes a worker searches before handing work back)
+    :return: bool (True if solved, False otherwise)
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return engine.solve(bo)
+    _, solution = _run(bo, False, None, workers, target, slice_nodes)
+    if solution is None:
+        return False
+    for row, solved in zip(bo, solution):
+        row[:] = solved
+    return True
+
+
+def count_solutions(bo, limit=None, workers=None, target=None, slice_nodes=SLICE_NODES):
+    """
+    Counts the solutions of a board with a pool of worker processes.
+    :param bo: 2D list representing the Sudoku board (left unchanged)
+    :param limit: int (stop counting here, None to count them all)
+    :param workers: int (processes to use, defaults to the CPU count;
+                    1 counts in the calling process)
+    :param target: int (subproblems to split into up front, defaults to four
+                   per worker)
+    :param slice_nodes: int (nodes a worker searches before handing work back)
+    :return: int
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return engine.count_solutions(bo, limit)
+    return _run(bo, True, limit, workers, target, slice_nodes)[0]
@@ -0,0 +1,91 @@
+"""
+Background prefetching.
+
+A ``Prefetcher`` keeps a few ready items per key (puzzles per difficulty, for
+the games) in bounded queues that a daemon thread tops up, so taking one is
+immediate and a slow generation happens while the player is still busy with
+the last puzzle instead of while they wait for the next one.
+
+If ``make`` raises on the worker thread, the worker stops and the exception is
+raised from the next ``get``, which then starts a new worker.
+"""
+
+import collections
+import threading
+
+
+class Prefetcher:
+    """
+    Bounded per-key queues of ready items, refilled in the background.
+    :param make: function(key) returning a new item (called on the worker thread)
+    :param keys: iterable of keys to keep items ready for
+    :param depth: int (items kept ready per key)
+    """
+
+    def __init__(self, make, keys, depth=3):
+        self.make = make
+        self.depth = depth
+        self.ready = {key: collections.deque() for key in keys}
+        self.condition = threading.Condition()
+        self.closed = False
+        self.error = None  # Exception that stopped the worker, until get raises it
+        self._start()
+
+    def _start(self):
+        self.thread = threading.Thread(target=self._fill, name="prefetch", daemon=True)
+        self.thread.start()
+
+    def get(self, key):
+        """
+        Takes a ready item, or makes one on the spot if none is ready yet.
+        :param key: hashable
+        :return: item
+        :raises: whatever make raised on the worker thread, if it failed
+        """
+        with self.condition:
+            error = self.error
+            if error is not None:
+                self.error = None
+                if not self.closed:
+                    self._start()
+                raise error
+            queue = self.ready.get(key)
+            if queue:
+                self.condition.notify()  # Wake the worker to refill
+                return queue.popleft()
+        return self.make(key)
+
+    def available(self, key):
+        """
+        :return: int (items ready for key)
+        """
+        with self.condition:
+            return len(self.ready.get(key, ()))
+
+    def close(self):
+        """
+        Stops the worker once it has finished the item it's making, if any.
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+
+    def _fill(self):
+        while True:
+            with self.condition:
+                while not self.closed and all(len(q) >= self.depth for q in self.ready.values()):
+                    self.condition.wait()
+                if self.closed:
+                    return
+                # Refill whichever key is closest to running out
+                key = min(self.ready, key=lambda k: len(self.ready[k]))
+
+            try:
+                item = self.make(key)
+            except Exception as exc:
+                with self.condition:
+                    self.error = exc
+                return
+
+            with self.condition:
+                self.ready[key].append(item)
@@ -0,0 +1,215 @@
+"""
+Pregenerated puzzle bank.
+
+A bank file holds 9x9 puzzles with their solutions, grouped by difficulty, in
+fixed-size records so any one of them can be read straight out of a memory
+map without parsing the rest of the file.
+
+Layout (all integers little-endian):
+
+    header   magic b"SDKB", version (u8), difficulty count (u8), 2 pad bytes
+    index    per difficulty: first record (u32), record count (u32)
+    records  puzzle (41 bytes), solution (41 bytes), difficulty tag (u8)
+
+Puzzle and solution are the 81 cells in row-major order packed two per byte,
+high nibble first, 0 for an empty cell.
+
+Build a bank with:
+
+    python puzzle_bank.py puzzles.bank --easy 10000 --medium 10000 --hard 10000
+
+Add ``--rate`` to sort puzzles into difficulties with the technique rater
+instead of by clue count.
+"""
+
+import argparse
+import mmap
+import os
+import random
+import struct
+
+import generator
+import rater
+
+MAGIC = b"SDKB"
+VERSION = 1
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+CLUES = {"Easy": 51, "Medium": 41, "Hard": 31}  # Matches Sudoku.generate_board
+
+HEADER = struct.Struct("<4sBB2x")
+INDEX_ENTRY = struct.Struct("<II")
+PACKED_SIZE = 41
+RECORD_SIZE = 2 * PACKED_SIZE + 1
+
+
+def pack(bo):
+    """
+    Packs a 9x9 board into 41 bytes, one nibble per cell.
+    :param bo: 2D list representing the Sudoku board
+    :return: bytes
+    """
+    cells = [num for row in bo for num in row] + [0]
+    return bytes((cells[i] << 4) | cells[i + 1] for i in range(0, 82, 2))
+
+
+def unpack(data):
+    """
+    Reverses ``pack``.
+    :param data: bytes-like (41 bytes)
+    :return: 2D list
+    """
+    cells = []
+    for byte in data:
+        cells.append(byte >> 4)
+        cells.append(byte & 0xF)
+    return [cells[i:i + 9] for i in range(0, 81, 9)]
+
+
+class PuzzleBank:
+    """
+    Read-only view of a bank file through ``mmap``.
+    :param path: str (bank file written by ``build``)
+    """
+
+    def __init__(self, path):
+        error = ValueError("%s is not a version %d puzzle bank" % (path, VERSION))
+        with open(path, "rb") as f:
+            # mmap can't map an empty file, so check the header before mapping
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise error
+            magic, version, count = HEADER.unpack(header)
+            if magic != MAGIC or version != VERSION or count > len(DIFFICULTIES):
+                raise error
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.records_offset = HEADER.size + count * INDEX_ENTRY.size
+        self.index = {}
+        end = self.records_offset
+        if len(self.data) >= end:
+            for i in range(count):
+                first, records = INDEX_ENTRY.unpack_from(self.data, HEADER.size + i * INDEX_ENTRY.size)
+                self.index[DIFFICULTIES[i]] = (first, records)
+                end = max(end, self.records_offset + (first + records) * RECORD_SIZE)
+        if len(self.data) < end:
+            self.data.close()
+            raise error  # Truncated
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.data.close()
+
+    def count(self, difficulty):
+        """
+        :param difficulty: str ("Easy", "Medium" or "Hard")
+        :return: int (number of puzzles stored for that difficulty)
+        """
+        return self.index.get(difficulty, (0, 0))[1]
+
+    def get(self, difficulty, i):
+        """
+        Reads the i-th puzzle of a difficulty.
+        :param difficulty: str ("Easy", "Medium" or "Hard")
+        :param i: int
+        :return: tuple (puzzle, solution) of 2D lists
+        """
+        first, count = self.index.get(difficulty, (0, 0))
+        if not 0 <= i < count:
+            raise IndexError("%s puzzle %d out of range" % (difficulty, i))
+        offset = self.records_offset + (first + i) * RECORD_SIZE
+        return (unpack(self.data[offset:offset + PACKED_SIZE]),
+                unpack(self.data[offset + PACKED_SIZE:offset + 2 * PACKED_SIZE]))
+
+    def random(self, difficulty, rng=random):
+        """
+        Picks a random puzzle of a difficulty.
+        :param difficulty: str ("Easy", "Medium" or "Hard")
+        :param rng: random.Random (or the random module)
+        :return: tuple (puzzle, solution) of 2D lists
+        """
+        count = self.count(difficulty)
+        if not count:
+            raise LookupError("the bank has no %s puzzles" % difficulty)
+        return self.get(difficulty, rng.randrange(count))
+
+
+def _rated_puzzles(counts, rng):
+    """
+    Generates minimal puzzles and sorts them into difficulties by rating
+    until every difficulty has as many as it needs.
+    :return: dict (difficulty -> list of (puzzle, solution))
+    """
+    buckets = {difficulty: [] for difficulty in DIFFICULTIES}
+    missing = sum(counts.get(difficulty, 0) for difficulty in DIFFICULTIES)
+    while missing:
+        puzzle, solution = generator.generate(3, 0, rng)
+        difficulty = rater.difficulty(rater.rate(puzzle))
+        if len(buckets[difficulty]) < counts.get(difficulty, 0):
+            buckets[difficulty].append((puzzle, solution))
+            missing -= 1
+    return buckets
+
+
+def build(path, counts, rng=random, rate=False):
+    """
+    Generates puzzles and writes them to a bank file. The file is written
+    next to path and moved into place at the end, so an interrupted build
+    never leaves a partial bank where the games look for one.
+    :param path: str
+    :param counts: dict (difficulty -> number of puzzles)
+    :param rng: random.Random (or the random module)
+    :param rate: bool (bucket puzzles with the rater instead of by clue count)
+    :return: None
+    """
+    buckets = _rated_puzzles(counts, rng) if rate else None
+
+    tmp = path + ".tmp"
+    try:
+        _write(tmp, counts, rng, buckets)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _write(path, counts, rng, buckets):
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(DIFFICULTIES)))
+        first = 0
+        for difficulty in DIFFICULTIES:
+            count = counts.get(difficulty, 0)
+            f.write(INDEX_ENTRY.pack(first, count))
+            first += count
+
+        for tag, difficulty in enumerate(DIFFICULTIES):
+            for i in range(counts.get(difficulty, 0)):
+                if buckets is not None:
+                    puzzle, solution = buckets[difficulty][i]
+                else:
+                    puzzle, solution = generator.generate(3, CLUES[difficulty], rng)
+                f.write(pack(puzzle) + pack(solution) + bytes((tag,)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a puzzle bank file.")
+    parser.add_argument("path", help="bank file to write")
+    for difficulty in DIFFICULTIES:
+        parser.add_argument("--" + difficulty.lower(), type=int, default=0,
+                            help="number of %s puzzles" % difficulty)
+    parser.add_argument("--rate", action="store_true",
+                        help="sort puzzles by technique rating instead of clue count")
+    parser.add_argument("--seed", type=int, help="random seed")
+    args = parser.parse_args(argv)
+
+    counts = {d: getattr(args, d.lower()) for d in DIFFICULTIES}
+    build(args.path, counts, random.Random(args.seed), args.rate)
+
+
+if __name__ == "__main__":
+    main()
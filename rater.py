@@ -0,0 +1,311 @@
+"""
+Technique-based difficulty rater.
+
+Solves a 9x9 puzzle the way a person would, always using the easiest technique
+on the ladder that still makes progress, and rates it by the hardest technique
+it needed and how many steps it took. A puzzle the ladder can't finish needs
+guessing, which is the top of the scale.
+"""
+
+import collections
+import itertools
+
+import batch
+
+HIDDEN_SINGLE = 1
+NAKED_SINGLE = 2
+POINTING = 3
+CLAIMING = 4
+NAKED_PAIR = 5
+HIDDEN_PAIR = 6
+NAKED_TRIPLE = 7
+X_WING = 8
+SWORDFISH = 9
+GUESS = 10
+
+TECHNIQUES = {
+    HIDDEN_SINGLE: "Hidden single",
+    NAKED_SINGLE: "Naked single",
+    POINTING: "Pointing",
+    CLAIMING: "Claiming",
+    NAKED_PAIR: "Naked pair",
+    HIDDEN_PAIR: "Hidden pair",
+    NAKED_TRIPLE: "Naked triple",
+    X_WING: "X-wing",
+    SWORDFISH: "Swordfish",
+    GUESS: "Guess",
+}
+
+# Difficulty buckets by the hardest technique needed
+DIFFICULTY = {
+    HIDDEN_SINGLE: "Easy",
+    NAKED_SINGLE: "Easy",
+    POINTING: "Medium",
+    CLAIMING: "Medium",
+    NAKED_PAIR: "Medium",
+    HIDDEN_PAIR: "Medium",
+    NAKED_TRIPLE: "Hard",
+    X_WING: "Hard",
+    SWORDFISH: "Hard",
+    GUESS: "Hard",
+}
+
+Rating = collections.namedtuple("Rating", "level technique steps")
+Rating.__doc__ = """
+Result of ``rate``.
+level: int (hardest technique used, see TECHNIQUES; 0 if the puzzle is
+       already broken)
+technique: str (its name, or "Invalid")
+steps: int (technique applications until solved or stuck)
+"""
+
+ALL_DIGITS = 0x1FF
+ROWS = [[r * 9 + c for c in range(9)] for r in range(9)]
+COLS = [[r * 9 + c for r in range(9)] for c in range(9)]
+BOXES = [[(b // 3 * 3 + i // 3) * 9 + b % 3 * 3 + i % 3 for i in range(9)] for b in range(9)]
+UNITS = ROWS + COLS + BOXES
+BOX_OF = [(cell // 27) * 3 + cell % 9 // 3 for cell in range(81)]
+PEERS = [
+    sorted(set(ROWS[cell // 9] + COLS[cell % 9] + BOXES[BOX_OF[cell]]) - {cell})
+    for cell in range(81)
+]
+
+
+class _Contradiction(Exception):
+    pass
+
+
+class LogicSolver:
+    """
+    Candidate grid worked on by the technique ladder.
+    :param bo: 2D list representing the Sudoku board (left unchanged)
+    """
+
+    def __init__(self, bo):
+        self.values = [num for row in bo for num in row]
+        self.cand = [ALL_DIGITS] * 81
+        for cell, num in enumerate(self.values):
+            if num:
+                self.values[cell] = 0
+                self.place(cell, num)
+
+    def place(self, cell, num):
+        bit = 1 << (num - 1)
+        if not self.cand[cell] & bit:
+            raise _Contradiction()
+        self.values[cell] = num
+        self.cand[cell] = 0
+        cand = self.cand
+        for peer in PEERS[cell]:
+            cand[peer] &= ~bit
+
+    def eliminate(self, cells, mask):
+        """
+        Removes digits from the candidates of some cells.
+        :return: bool (True if anything was removed)
+        """
+        cand = self.cand
+        changed = False
+        for cell in cells:
+            if cand[cell] & mask:
+                cand[cell] &= ~mask
+                if not cand[cell]:
+                    raise _Contradiction()
+                changed = True
+        return changed
+
+    def hidden_single(self):
+        values, cand = self.values, self.cand
+        for unit in UNITS:
+            once = twice = placed = 0
+            for cell in unit:
+                if values[cell]:
+                    placed |= 1 << (values[cell] - 1)
+                else:
+                    twice |= once & cand[cell]
+                    once |= cand[cell]
+            if (once | placed) != ALL_DIGITS:
+                raise _Contradiction()
+            singles = once & ~twice
+            if singles:
+                bit = singles & -singles
+                for cell in unit:
+                    if cand[cell] & bit:
+                        self.place(cell, bit.bit_length())
+                        return True
+        return False
+
+    def naked_single(self):
+        values, cand = self.values, self.cand
+        for cell in range(81):
+            if not values[cell]:
+                free = cand[cell]
+                if not free:
+                    raise _Contradiction()
+                if not free & (free - 1):
+                    self.place(cell, free.bit_length())
+                    return True
+        return False
+
+    def pointing(self):
+        cand = self.cand
+        for b, box in enumerate(BOXES):
+            for d in range(9):
+                bit = 1 << d
+                cells = [cell for cell in box if cand[cell] & bit]
+                if len(cells) < 2:
+                    continue
+                if len({cell // 9 for cell in cells}) == 1:
+                    line = ROWS[cells[0] // 9]
+                elif len({cell % 9 for cell in cells}) == 1:
+                    line = COLS[cells[0] % 9]
+                else:
+                    continue
+                if self.eliminate([cell for cell in line if BOX_OF[cell] != b], bit):
+                    return True
+        return False
+
+    def claiming(self):
+        cand = self.cand
+        for line in ROWS + COLS:
+            for d in range(9):
+                bit = 1 << d
+                cells = [cell for cell in line if cand[cell] & bit]
+                if len(cells) < 2 or len({BOX_OF[cell] for cell in cells}) != 1:
+                    continue
+                box = BOXES[BOX_OF[cells[0]]]
+                if self.eliminate([cell for cell in box if cell not in line], bit):
+                    return True
+        return False
+
+    def naked_subset(self, size):
+        cand = self.cand
+        for unit in UNITS:
+            cells = [cell for cell in unit if 2 <= bin(cand[cell]).count("1") <= size]
+            for group in itertools.combinations(cells, size):
+                mask = 0
+                for cell in group:
+                    mask |= cand[cell]
+                if bin(mask).count("1") == size:
+                    others = [cell for cell in unit if cell not in group]
+                    if self.eliminate(others, mask):
+                        return True
+        return False
+
+    def hidden_pair(self):
+        cand = self.cand
+        for unit in UNITS:
+            where = [0] * 9  # Unit positions each digit can still take
+            for i, cell in enumerate(unit):
+                free = cand[cell]
+                while free:
+                    bit = free & -free
+                    free ^= bit
+                    where[bit.bit_length() - 1] |= 1 << i
+            for d1 in range(9):
+                if bin(where[d1]).count("1") != 2:
+                    continue
+                for d2 in range(d1 + 1, 9):
+                    if where[d2] == where[d1]:
+                        pair = (1 << d1) | (1 << d2)
+                        cells = [unit[i] for i in range(9) if where[d1] >> i & 1]
+                        if self.eliminate(cells, ALL_DIGITS & ~pair):
+                            return True
+        return False
+
+    def fish(self, size):
+        cand = self.cand
+        for bases, covers in ((ROWS, COLS), (COLS, ROWS)):
+            for d in range(9):
+                bit = 1 << d
+                lines = []
+                for b, base in enumerate(bases):
+                    spots = 0
+                    for i, cell in enumerate(base):
+                        if cand[cell] & bit:
+                            spots |= 1 << i
+                    if 2 <= bin(spots).count("1") <= size:
+                        lines.append((b, spots))
+                for group in itertools.combinations(lines, size):
+                    spots = 0
+                    for _, line_spots in group:
+                        spots |= line_spots
+                    if bin(spots).count("1") != size:
+                        continue
+                    used = {b for b, _ in group}
+                    others = [
+                        cell
+                        for i in range(9) if spots >> i & 1
+                        for b, cell in enumerate(covers[i]) if b not in used
+                    ]
+                    if self.eliminate(others, bit):
+                        return True
+        return False
+
+    def step(self):
+        """
+        Applies the easiest technique that makes progress.
+        :return: int (its level, or GUESS if none applies)
+        """
+        if self.hidden_single():
+            return HIDDEN_SINGLE
+        if self.naked_single():
+            return NAKED_SINGLE
+        if self.pointing():
+            return POINTING
+        if self.claiming():
+            return CLAIMING
+        if self.naked_subset(2):
+            return NAKED_PAIR
+        if self.hidden_pair():
+            return HIDDEN_PAIR
+        if self.naked_subset(3):
+            return NAKED_TRIPLE
+        if self.fish(2):
+            return X_WING
+        if self.fish(3):
+            return SWORDFISH
+        return GUESS
+
+
+def rate(bo):
+    """
+    Rates a puzzle by the techniques needed to solve it.
+    :param bo: 2D list representing the Sudoku board (left unchanged)
+    :return: Rating
+    """
+    steps = 0
+    hardest = 0
+    try:
+        solver = LogicSolver(bo)
+        while 0 in solver.values:
+            level = solver.step()
+            hardest = max(hardest, level)
+            if level == GUESS:
+                break
+            steps += 1
+    except _Contradiction:
+        return Rating(0, "Invalid", steps)
+    return Rating(hardest, TECHNIQUES.get(hardest, "Given"), steps)
+
+
+def difficulty(rating):
+    """
+    Maps a rating to the Easy / Medium / Hard buckets used by the games.
+    :param rating: Rating
+    :return: str (None for an invalid puzzle)
+    """
+    if rating.level == 0 and rating.technique == "Invalid":
+        return None
+    return DIFFICULTY.get(rating.level, "Easy")
+
+
+def rate_many(puzzles, workers=None, chunksize=None):
+    """
+    Rates many puzzles across a pool of worker processes.
+    :param puzzles: iterable of 2D lists
+    :param workers: int (processes to use, defaults to the CPU count)
+    :param chunksize: int (puzzles handed to a worker at a time)
+    :return: iterator of Rating, in input order
+    """
+    return batch.imap(rate, puzzles, workers, chunksize)
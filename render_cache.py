@@ -0,0 +1,82 @@
+"""
+Font and text-surface cache for the GUIs.
+
+Looking up a font and rendering text are the slow parts of drawing a board,
+yet a board only ever shows a handful of strings: the digits in a few colors
+and the button labels. Fonts are created once per name and size, and each
+(font, text, color) surface is rendered once, so a frame is just blits.
+"""
+
+import pygame
+
+_fonts = {}
+_surfaces = {}
+
+
+def sys_font(name, size):
+    """
+    Cached ``pygame.font.SysFont``.
+    :param name: str (system font name)
+    :param size: int
+    :return: pygame.font.Font
+    """
+    key = ("sys", name, size)
+    fnt = _fonts.get(key)
+    if fnt is None:
+        fnt = _fonts[key] = pygame.font.SysFont(name, size)
+    return fnt
+
+
+def font(path, size):
+    """
+    Cached ``pygame.font.Font``.
+    :param path: str (font file, None for pygame's default font)
+    :param size: int
+    :return: pygame.font.Font
+    """
+    key = ("file", path, size)
+    fnt = _fonts.get(key)
+    if fnt is None:
+        fnt = _fonts[key] = pygame.font.Font(path, size)
+    return fnt
+
+
+def text(fnt, string, color, antialias=True):
+    """
+    Renders a string once and hands back the same surface afterwards.
+    Don't draw on the returned surface, it's shared.
+    :param fnt: pygame.font.Font
+    :param string: str
+    :param color: tuple (RGB)
+    :param antialias: bool
+    :return: pygame.Surface
+    """
+    key = (fnt, string, color, bool(antialias))
+    surface = _surfaces.get(key)
+    if surface is None:
+        surface = _surfaces[key] = fnt.render(string, antialias, color)
+    return surface
+
+
+def prerender(fnt, strings, colors, antialias=True):
+    """
+    Renders every (string, color) pair up front, e.g. the digits of a board,
+    so the first frame doesn't pay for them.
+    :param fnt: pygame.font.Font
+    :param strings: iterable of str
+    :param colors: iterable of tuple (RGB)
+    :param antialias: bool
+    :return: None
+    """
+    colors = list(colors)
+    for string in strings:
+        for color in colors:
+            text(fnt, string, color, antialias)
+
+
+def clear():
+    """
+    Drops every cached font and surface.
+    """
+    _fonts.clear()
+    _surfaces.clear()
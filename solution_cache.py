@@ -0,0 +1,150 @@
+"""
+Solution cache in front of a solver.
+
+Solutions are kept by puzzle in an LRU map. A repeat of a puzzle seen before
+is a single dictionary lookup. A puzzle that is only equivalent to one seen
+before (relabelled, rows or columns swapped, transposed, see
+``canonical.py``) is found through its canonical form, and the stored
+solution is mapped back through the transform.
+
+Every entry maps a puzzle string to a solution of that puzzle ("" if it has
+none), so puzzles as given and canonical forms share one map. An optional
+``dbm`` file keeps canonical solutions across restarts.
+
+Boards with fewer than ``MIN_CLUES`` givens are solved directly and not
+cached: they can't be proper puzzles (no 9x9 puzzle with fewer than 17 clues
+has a unique solution), repeats of them are unlikely, and they're the boards
+whose canonical forms cost the most to work out.
+"""
+
+import collections
+import dbm
+
+import engine
+from board import Board
+from canonical import apply_transform, canonical_transform, undo_transform
+
+MIN_CLUES = 17  # Fewer givens than this skip the cache, see above
+
+
+class SolutionCache:
+    """
+    LRU cache of solutions keyed by puzzle and by canonical form.
+    :param maxsize: int (entries kept in memory)
+    :param path: str (dbm file for the on-disk tier, None to keep to memory)
+    :param solve_fn: function (solve(bo) -> bool, called on a miss)
+    :param min_clues: int (boards with fewer givens are solved without caching)
+    """
+
+    def __init__(self, maxsize=10000, path=None, solve_fn=engine.solve, min_clues=MIN_CLUES):
+        self.maxsize = maxsize
+        self.solve_fn = solve_fn
+        self.min_clues = min_clues
+        self.entries = collections.OrderedDict()
+        self.disk = dbm.open(path, "c") if path else None
+        self.hits = 0  # Answered from memory
+        self.disk_hits = 0  # Answered from the on-disk tier
+        self.misses = 0  # Had to be solved
+        self.uncached = 0  # Too few clues to cache, solved directly
+        self.evictions = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
+            self.disk = None
+
+    def solve(self, bo):
+        """
+        Solves a board in place, from the cache if possible.
+        :param bo: 2D list representing the Sudoku board
+        :return: bool (True if solved, False otherwise)
+        """
+        solution = self.solution(bo)
+        if solution is None:
+            return False
+        for row, solved in zip(bo, solution):
+            row[:] = solved
+        return True
+
+    def solution(self, bo):
+        """
+        Looks up, or works out and remembers, a solution of a board.
+        :param bo: 2D list representing the Sudoku board (left unchanged)
+        :return: 2D list (None if the board has no solution)
+        """
+        if sum(1 for row in bo for num in row if num) < self.min_clues:
+            self.uncached += 1
+            work = [row[:] for row in bo]
+            return work if self.solve_fn(work) else None
+
+        key = Board.from_lists(bo).to_string()
+        text = self._get(key)
+        if text is not None:
+            self.hits += 1
+            return Board.from_string(text).to_lists() if text else None
+
+        form, transform = canonical_transform(bo)
+        text = self._get(form)
+        if text is not None:
+            self.hits += 1
+        elif self.disk is not None and form.encode("ascii") in self.disk:
+            text = self.disk[form.encode("ascii")].decode("ascii")
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            work = [row[:] for row in bo]
+            text = Board.from_lists(apply_transform(work, transform)).to_string() if self.solve_fn(work) else ""
+            if self.disk is not None:
+                self.disk[form.encode("ascii")] = text.encode("ascii")
+        self._put(form, text)
+
+        if not text:
+            self._put(key, "")
+            return None
+        solution = undo_transform(Board.from_string(text).to_lists(), transform)
+        self._put(key, Board.from_lists(solution).to_string())
+        return solution
+
+    def stats(self):
+        """
+        :return: dict of the hit and miss counters
+        """
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "uncached": self.uncached,
+            "evictions": self.evictions,
+            "size": len(self.entries),
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else None,
+        }
+
+    def clear(self):
+        """
+        Empties the in-memory tier and resets the counters.
+        """
+        self.entries.clear()
+        self.hits = self.disk_hits = self.misses = self.uncached = self.evictions = 0
+
+    def _get(self, key):
+        text = self.entries.get(key)
+        if text is not None:
+            self.entries.move_to_end(key)
+        return text
+
+    def _put(self, key, text):
+        self.entries[key] = text
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
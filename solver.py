@@ -1,16 +1,24 @@
-def solve(bo):
+import math
+
+
+def solve(bo, stats=None):
     """
     Solves the Sudoku board using backtracking.
     :param bo: 2D list representing the Sudoku board
+    :param stats: SearchStats to record the search in (optional)
     :return: bool (True if solved, False otherwise)
     """
+    if stats is not None:
+        with stats.timing():
+            return _solve_traced(bo, stats, 0)
+
     find = find_empty(bo)
     if not find:
         return True  # Board is solved
     else:
         row, col = find
 
-    for i in range(1, 10):
+    for i in range(1, len(bo) + 1):
         if valid(bo, i, (row, col)):
             bo[row][col] = i  # Place the number
 
@@ -22,6 +30,93 @@ def solve(bo):
     return False
 
 
+def _solve_traced(bo, stats, depth):
+    """
+    Same search as ``solve``, reporting every step to a SearchStats.
+    Kept separate so the untraced search pays nothing for it.
+    :return: bool (True if solved, False otherwise)
+    """
+    stats.enter(depth)
+    find = find_empty(bo)
+    if not find:
+        return True  # Board is solved
+    else:
+        row, col = find
+
+    fitted = False
+    for i in range(1, len(bo) + 1):
+        stats.valid_calls += 1
+        if valid(bo, i, (row, col)):
+            bo[row][col] = i  # Place the number
+            stats.placed(row, col, i)
+            fitted = True
+
+            if _solve_traced(bo, stats, depth + 1):
+                return True
+
+            bo[row][col] = 0  # Reset if solution fails
+            stats.undone(row, col, i)
+
+    if not fitted:
+        stats.dead_end(row, col)
+    return False
+
+
+PLACE = "place"  # Step kinds yielded by solve_steps
+UNDO = "undo"
+
+
+def solve_steps(bo, stats=None):
+    """
+    Same search as ``solve``, one step at a time, so a caller can show the
+    search without blocking on it. Each step is yielded after it has been made
+    on the board.
+    :param bo: 2D list representing the Sudoku board
+    :param stats: SearchStats to record the search in (optional)
+    :return: generator of tuple (PLACE or UNDO, row, col, num); it returns
+             True if the board got solved, False otherwise
+    """
+    size = len(bo)
+    trail = []  # (row, col, num) of every placement still on the board
+    find = find_empty(bo)
+    num = 0
+    if stats is not None:
+        stats.enter(0)
+
+    while find:
+        row, col = find
+        fresh = num == 0  # First visit to this cell, not a return after an undo
+        for num in range(num + 1, size + 1):
+            if stats is not None:
+                stats.valid_calls += 1
+            if valid(bo, num, find):
+                bo[row][col] = num  # Place the number
+                trail.append((row, col, num))
+                if stats is not None:
+                    stats.placed(row, col, num)
+                yield PLACE, row, col, num
+
+                find = find_empty(bo)
+                num = 0
+                if stats is not None:
+                    stats.enter(len(trail))
+                break
+        else:
+            if stats is not None and fresh:
+                stats.dead_end(row, col)
+            if not trail:
+                return False
+
+            row, col, num = trail.pop()
+            bo[row][col] = 0  # Reset and try the next number there
+            if stats is not None:
+                stats.undone(row, col, num)
+            yield UNDO, row, col, num
+            find = (row, col)
+
+    return True
+
+
 def valid(bo, num, pos):
     """
     Checks if placing a number at a position is valid.
@@ -40,36 +135,53 @@ def valid(bo, num, pos):
         if bo[i][pos[1]] == num and pos[0] != i:
             return False
 
-    # Check 3x3 box
-    box_x = pos[1] // 3
-    box_y = pos[0] // 3
+    # Check box
+    n = box_size(bo)
+    box_x = pos[1] // n
+    box_y = pos[0] // n
 
-    for i in range(box_y * 3, box_y * 3 + 3):
-        for j in range(box_x * 3, box_x * 3 + 3):
+    for i in range(box_y * n, box_y * n + n):
+        for j in range(box_x * n, box_x * n + n):
             if bo[i][j] == num and (i, j) != pos:
                 return False
 
     return True
 
 
+def box_size(bo):
+    """
+    Works out the box size n of an n²×n² board (3 for 9x9, 4 for 16x16).
+    :param bo: 2D list representing the Sudoku board
+    :return: int
+    """
+    n = math.isqrt(len(bo))
+    if n * n != len(bo):
+        raise ValueError("board size must be a perfect square, got %d" % len(bo))
+    return n
+
+
 def print_board(bo):
     """
     Prints the Sudoku board in a readable format.
     :param bo: 2D list representing the Sudoku board
     :return: None
     """
+    n = box_size(bo)
+    width = len(str(len(bo)))
+    line = "- " * ((len(bo) * (width + 1) + (n - 1) * 3) // 2) + "-"
+
     for i in range(len(bo)):
-        if i % 3 == 0 and i != 0:
-            print("- - - - - - - - - - - - -")
+        if i % n == 0 and i != 0:
+            print(line)
 
         for j in range(len(bo[0])):
-            if j % 3 == 0 and j != 0:
+            if j % n == 0 and j != 0:
                 print(" | ", end="")
 
-            if j == 8:
-                print(bo[i][j])  # End of row
+            if j == len(bo[0]) - 1:
+                print(str(bo[i][j]).rjust(width))  # End of row
             else:
-                print(str(bo[i][j]) + " ", end="")
+                print(str(bo[i][j]).rjust(width) + " ", end="")
 
 
 def find_empty(bo):
@@ -1,3 +1,32 @@
+"""
+Text-mode Sudoku solver.
+
+Run it on a stream of puzzles, one per line (81 characters, ``0`` or ``.`` for
+an empty cell), and it writes one result per puzzle in the same order: the
+solved grid, or ``unsolvable``, ``timeout`` or ``invalid``.
+
+    python solvertxt.py puzzles.txt -o solutions.txt --workers 4 --timeout 2
+    cat puzzles.txt | python solvertxt.py --format pair
+
+Puzzles are read, solved and written a block at a time, so memory stays flat
+however big the input is. Solving uses the bitmask engine (``engine.py``),
+which can stop at a timeout; ``solve`` below is the plain backtracking
+version.
+"""
+
+import argparse
+
+import batch
+import engine
+from board import SYMBOLS, Board
+from solver import box_size
+
+UNSOLVABLE = "unsolvable"
+TIMEOUT = "timeout"
+INVALID = "invalid"
+FORMATS = ("line", "pair", "grid")
+
+
 def solve(bo):
     """
     Solves a Sudoku board using backtracking.
@@ -72,15 +101,111 @@ def print_board(bo):
     :param bo: 2D list of ints (Sudoku board)
     :return: None
     """
+    print(format_board(bo))
+
+
+def format_board(bo):
+    """
+    Lays the board out the way print_board shows it.
+    :param bo: 2D list of ints (Sudoku board)
+    :return: str (without a trailing newline)
+    """
+    n = box_size(bo)
+    separator = " ".join("-" * (len(bo) + 2 * n - 1))  # The usual 14 dashes for 9x9
+    lines = []
     for i in range(len(bo)):
-        if i % 3 == 0 and i != 0:
-            print("- - - - - - - - - - - - - -")
+        if i % n == 0 and i != 0:
+            lines.append(separator)
 
+        line = ""
         for j in range(len(bo[0])):
-            if j % 3 == 0 and j != 0:
-                print(" | ", end="")
+            if j % n == 0 and j != 0:
+                line += " | "
 
-            if j == 8:
-                print(bo[i][j])  # Move to the next line
+            if j == len(bo[0]) - 1:
+                line += SYMBOLS[bo[i][j]]
             else:
-                print(str(bo[i][j]) + " ", end="")
\ No newline at end of file
+                line += SYMBOLS[bo[i][j]] + " "
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def solve_line(line, timeout=None):
+    """
+    Solves one puzzle given in the one-line format.
+    :param line: str (``0`` or ``.`` for an empty cell)
+    :param timeout: float (seconds to give up after, None for no limit)
+    :return: tuple (solved 2D list or None, status str: "solved", UNSOLVABLE,
+             TIMEOUT or INVALID)
+    """
+    try:
+        bo = Board.from_string(line).to_lists()
+    except ValueError:
+        return None, INVALID
+
+    result = engine.solve_limited(bo, timeout=timeout)
+    if result.status == engine.SOLVED:
+        return result.board, "solved"
+    return None, TIMEOUT if result.status == engine.BUDGET_EXCEEDED else UNSOLVABLE
+
+
+def format_result(line, bo, status, fmt="line"):
+    """
+    :param line: str (the puzzle as read)
+    :param bo: solved 2D list, or None
+    :param status: str (from solve_line)
+    :param fmt: str ("line" for the solution alone, "pair" for
+                puzzle,solution, "grid" for print_board layout)
+    :return: str (ending in a newline)
+    """
+    if fmt == "grid":
+        return (format_board(bo) if bo else status) + "\n\n"
+    text = Board.from_lists(bo).to_string() if bo else status
+    if fmt == "pair":
+        return line + "," + text + "\n"
+    return text + "\n"
+
+
+def _solve_job(job):
+    line, timeout, fmt = job
+    bo, status = solve_line(line, timeout)
+    return format_result(line, bo, status, fmt)
+
+
+def solve_stream(lines, workers=None, timeout=None, fmt="line", chunksize=64):
+    """
+    Solves puzzles from an iterable of lines, skipping blank and ``#`` lines.
+    :param lines: iterable of str (consumed lazily)
+    :param workers: int (processes to use, defaults to the CPU count)
+    :param timeout: float (seconds per puzzle, None for no limit)
+    :param fmt: str (see format_result)
+    :param chunksize: int (puzzles handed to a worker at a time)
+    :return: iterator of str (one result per puzzle, in input order)
+    """
+    jobs = ((line, timeout, fmt) for line in (raw.strip() for raw in lines)
+            if line and not line.startswith("#"))
+    return batch.imap(_solve_job, jobs, workers, chunksize, True, True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve Sudoku puzzles given one per line.")
+    parser.add_argument("input", nargs="?", default="-", help="puzzle file (default: stdin)")
+    parser.add_argument("-o", "--output", default="-", help="result file (default: stdout)")
+    parser.add_argument("-w", "--workers", type=int,
+                        help="processes to use (default: the CPU count)")
+    parser.add_argument("--timeout", type=float, help="seconds to spend on a puzzle before giving up")
+    parser.add_argument("--format", choices=FORMATS, default="line",
+                        help="line: solution only, pair: puzzle,solution, grid: laid out (default: %(default)s)")
+    parser.add_argument("--chunksize", type=int, default=64,
+                        help="puzzles handed to a worker at a time (default: %(default)s)")
+    parser.add_argument("--flush-every", type=int, default=1024,
+                        help="results collected before each write (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    batch.pipe(args.input, args.output,
+               lambda source: solve_stream(source, args.workers, args.timeout, args.format, args.chunksize),
+               args.flush_every)
+
+
+if __name__ == "__main__":
+    main()
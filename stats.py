@@ -0,0 +1,79 @@
+"""
+Search instrumentation shared by the solvers and the GUIs.
+
+Pass a ``SearchStats`` to a solver to count what its search does; solvers only
+touch it when one is given, so leaving it out costs nothing.
+"""
+
+import contextlib
+import time
+
+
+class SearchStats:
+    """
+    Counters for a backtracking search, with optional per-event callbacks.
+    :param on_place: function(row, col, num) called when a digit is placed
+    :param on_undo: function(row, col, num) called when a digit is taken back
+    :param on_dead_end: function(row, col) called when no digit fits a cell
+    """
+
+    def __init__(self, on_place=None, on_undo=None, on_dead_end=None):
+        self.nodes = 0  # Search nodes expanded
+        self.backtracks = 0  # Digits placed and then taken back
+        self.valid_calls = 0  # Validity checks made
+        self.dead_ends = 0  # Nodes where no digit fitted (not those whose digits all failed further down)
+        self.max_depth = 0  # Deepest recursion level reached
+        self.elapsed = 0.0  # Wall time in seconds
+        self.on_place = on_place
+        self.on_undo = on_undo
+        self.on_dead_end = on_dead_end
+
+    def enter(self, depth):
+        self.nodes += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def placed(self, row, col, num):
+        if self.on_place:
+            self.on_place(row, col, num)
+
+    def undone(self, row, col, num):
+        self.backtracks += 1
+        if self.on_undo:
+            self.on_undo(row, col, num)
+
+    def dead_end(self, row, col):
+        self.dead_ends += 1
+        if self.on_dead_end:
+            self.on_dead_end(row, col)
+
+    @contextlib.contextmanager
+    def timing(self):
+        """
+        Adds the wall time of the ``with`` block to ``elapsed``.
+        """
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.elapsed += time.perf_counter() - start
+
+    def as_dict(self):
+        """
+        :return: dict of the counters, for dashboards and JSON
+        """
+        return {
+            "nodes": self.nodes,
+            "backtracks": self.backtracks,
+            "valid_calls": self.valid_calls,
+            "dead_ends": self.dead_ends,
+            "max_depth": self.max_depth,
+            "elapsed": self.elapsed,
+        }
+
+    def summary(self):
+        """
+        :return: str (one line, short enough for a window caption)
+        """
+        return "%d nodes, %d backtracks, %d checks, depth %d, %.2fs" % (
+            self.nodes, self.backtracks, self.valid_calls, self.max_depth, self.elapsed)
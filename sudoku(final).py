@@ -1,13 +1,21 @@
+import os
 import pygame
 import random
-import time
+
+import render_cache
+from animation import SolveAnimation
+from conflict_index import ConflictIndex
+from prefetch import Prefetcher
+from puzzle_bank import PuzzleBank
+from stats import SearchStats
 
 # Initialize pygame
 pygame.init()
 
 # Screen dimensions and colors
 WIDTH, HEIGHT = 600, 650
-GRID_SIZE = 9
+BOX_SIZE = 3
+GRID_SIZE = BOX_SIZE * BOX_SIZE
 CELL_SIZE = WIDTH // GRID_SIZE
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -15,10 +23,15 @@ GRAY = (200, 200, 200)
 BLUE = (100, 149, 237)
 RED = (255, 0, 0)
 GREEN = (34, 139, 34)
+FPS = 60  # Frame rate cap
+
+# Pregenerated puzzles (build with puzzle_bank.py); generated on the fly if missing
+BANK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "puzzles.bank")
+PREFETCH_DEPTH = 3  # Puzzles kept ready per difficulty
 
 # Fonts
-FONT = pygame.font.Font(None, 40)
-TITLE_FONT = pygame.font.Font(None, 60)
+FONT = render_cache.font(None, 40)
+TITLE_FONT = render_cache.font(None, 60)
 
 
 class Sudoku:
@@ -30,32 +43,34 @@ class Sudoku:
         self.selected_cell = None
         self.running = True
         self.difficulty = None  # To store difficulty level
+        self.stats = None  # Counters from the last auto-solve
+        self.animation = None  # Auto-solve being played back, if any
+        self.dirty = set()  # Cells to redraw on the next frame
+        self.redraw_all = True  # Set when the whole window needs redrawing
+        self.clock = pygame.time.Clock()
+        try:
+            self.bank = PuzzleBank(BANK_PATH)
+        except (OSError, ValueError):
+            self.bank = None  # Missing or unusable, puzzles are generated on the fly
+        self.prefetch = Prefetcher(self.make_puzzle, ("Easy", "Medium", "Hard"), PREFETCH_DEPTH)
+        render_cache.prerender(FONT, [str(num) for num in range(1, GRID_SIZE + 1)], [GRAY, BLUE])
         self.show_difficulty_menu()
 
     def show_difficulty_menu(self):
         """Display the difficulty level menu."""
+        redraw = True
         while True:
-            self.screen.fill(WHITE)
-            self.draw_text("Select Difficulty", WIDTH // 2, HEIGHT // 4, BLACK, TITLE_FONT)
-            
-            # Draw difficulty buttons
-            pygame.draw.rect(self.screen, GREEN, (50, HEIGHT // 2, 200, 40))
-            pygame.draw.rect(self.screen, BLUE, (350, HEIGHT // 2, 200, 40))
-            pygame.draw.rect(self.screen, RED, (50, HEIGHT // 2 + 60, 200, 40))
-            pygame.draw.rect(self.screen, BLACK, (350, HEIGHT // 2 + 60, 200, 40))
-
-            self.draw_text("Easy", 150, HEIGHT // 2 + 20, WHITE)
-            self.draw_text("Medium", 450, HEIGHT // 2 + 20, WHITE)
-            self.draw_text("Hard", 150, HEIGHT // 2 + 80, WHITE)
-            self.draw_text("Exit", 450, HEIGHT // 2 + 80, WHITE)
-
-            pygame.display.flip()
+            if redraw:
+                self.draw_difficulty_menu()
+                redraw = False
 
             # Event handling for selecting difficulty
-            for event in pygame.event.get():
+            for event in self.wait_events():
                 if event.type == pygame.QUIT:
                     pygame.quit()
                     exit()
+                elif event.type == pygame.VIDEOEXPOSE:
+                    redraw = True
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     pos = pygame.mouse.get_pos()
                     if 50 <= pos[0] <= 250 and HEIGHT // 2 <= pos[1] <= HEIGHT // 2 + 40:
@@ -74,21 +89,62 @@ class Sudoku:
                         pygame.quit()
                         exit()
 
+    def draw_difficulty_menu(self):
+        """Draw the difficulty level menu."""
+        self.screen.fill(WHITE)
+        self.draw_text("Select Difficulty", WIDTH // 2, HEIGHT // 4, BLACK, TITLE_FONT)
+
+        # Draw difficulty buttons
+        pygame.draw.rect(self.screen, GREEN, (50, HEIGHT // 2, 200, 40))
+        pygame.draw.rect(self.screen, BLUE, (350, HEIGHT // 2, 200, 40))
+        pygame.draw.rect(self.screen, RED, (50, HEIGHT // 2 + 60, 200, 40))
+        pygame.draw.rect(self.screen, BLACK, (350, HEIGHT // 2 + 60, 200, 40))
+
+        self.draw_text("Easy", 150, HEIGHT // 2 + 20, WHITE)
+        self.draw_text("Medium", 450, HEIGHT // 2 + 20, WHITE)
+        self.draw_text("Hard", 150, HEIGHT // 2 + 80, WHITE)
+        self.draw_text("Exit", 450, HEIGHT // 2 + 80, WHITE)
+
+        pygame.display.flip()
+
+    def wait_events(self, block=True):
+        """Sleep until at least one event arrives (unless block is False), then return all pending events."""
+        if block:
+            events = [pygame.event.wait()] + pygame.event.get()
+        else:
+            events = pygame.event.get()
+        self.clock.tick(FPS)
+        return events
+
     def generate_board(self):
         """Generate a random Sudoku puzzle based on selected difficulty."""
-        self.board = [[0] * GRID_SIZE for _ in range(GRID_SIZE)]
-        self.fill_board()  # Fill the board with a valid Sudoku solution
-        self.solution = [row[:] for row in self.board]  # Save the solution
-        
+        self.redraw_all = True
+        if self.prefetch:
+            self.board, self.solution = self.prefetch.get(self.difficulty)
+        else:
+            self.board, self.solution = self.make_puzzle(self.difficulty)
+        self.index = ConflictIndex(self.board)  # Digit counts per row, column and box for key presses
+
+    def make_puzzle(self, difficulty):
+        """Make a (puzzle, solution) pair without touching the board on screen, so it can run on the prefetch thread."""
+        if self.bank and self.bank.count(difficulty):
+            return self.bank.random(difficulty)
+
+        maker = Sudoku.__new__(Sudoku)  # Scratch game to fill and dig, skipping the window setup
+        maker.board = [[0] * GRID_SIZE for _ in range(GRID_SIZE)]
+        maker.fill_board()  # Fill the board with a valid Sudoku solution
+        solution = [row[:] for row in maker.board]  # Save the solution
+
         # Set the number of blocks to remove based on difficulty
-        if self.difficulty == "Easy":
+        if difficulty == "Easy":
             blocks_to_remove = 30
-        elif self.difficulty == "Medium":
+        elif difficulty == "Medium":
             blocks_to_remove = 40
-        elif self.difficulty == "Hard":
+        elif difficulty == "Hard":
             blocks_to_remove = 50
 
-        self.remove_numbers(blocks_to_remove)  # Remove the appropriate number of blocks
+        maker.remove_numbers(blocks_to_remove)  # Remove the appropriate number of blocks
+        return maker.board, solution
 
     def fill_board(self):
         """Fill the board with a valid Sudoku solution using backtracking."""
@@ -108,9 +164,9 @@ class Sudoku:
         for i in range(GRID_SIZE):
             if self.board[row][i] == num or self.board[i][col] == num:
                 return False
-        start_row, start_col = (row // 3) * 3, (col // 3) * 3
-        for i in range(start_row, start_row + 3):
-            for j in range(start_col, start_col + 3):
+        start_row, start_col = (row // BOX_SIZE) * BOX_SIZE, (col // BOX_SIZE) * BOX_SIZE
+        for i in range(start_row, start_row + BOX_SIZE):
+            for j in range(start_col, start_col + BOX_SIZE):
                 if self.board[i][j] == num:
                     return False
         return True
@@ -131,49 +187,34 @@ class Sudoku:
                     return False
         return True
 
-    def auto_solve(self):
-        """Auto-solve the Sudoku puzzle with animation."""
-        for i in range(GRID_SIZE):
-            for j in range(GRID_SIZE):
-                if self.board[i][j] == 0:
-                    for num in range(1, GRID_SIZE + 1):
-                        if self.is_valid(i, j, num):
-                            self.board[i][j] = num
-                            self.draw_board()
-                            pygame.display.flip()
-                            time.sleep(0.05)
-                            if self.auto_solve():
-                                return True
-                            self.board[i][j] = 0
-                            self.draw_board()
-                            pygame.display.flip()
-                            time.sleep(0.05)
-                    return False
-        return True
+    def auto_solve(self, stats=None, speed=20):
+        """Start auto-solving the puzzle with animation; play() takes the steps frame by frame."""
+        self.animation = SolveAnimation(self.board, speed, stats=stats)
+        return self.animation
+
+    def step_animation(self):
+        """Take the auto-solve steps due this frame and mark the cells they touched."""
+        for _, row, col, _ in self.animation.advance():
+            self.dirty.add((row, col))
+        if not self.animation.running:
+            self.animation = None
+            self.index = ConflictIndex(self.board)
+            self.redraw_all = True
+            pygame.display.set_caption("Sudoku Solver - " + self.stats.summary())
 
     def draw_board(self):
         """Draw the Sudoku board."""
         self.screen.fill(WHITE)
-
-        # Draw grid lines
-        for i in range(GRID_SIZE + 1):
-            line_width = 3 if i % 3 == 0 else 1
-            pygame.draw.line(self.screen, BLACK, (i * CELL_SIZE, 0), (i * CELL_SIZE, WIDTH), line_width)
-            pygame.draw.line(self.screen, BLACK, (0, i * CELL_SIZE), (WIDTH, i * CELL_SIZE), line_width)
+        self.draw_grid_lines()
 
         # Draw numbers in the grid
         for row in range(GRID_SIZE):
             for col in range(GRID_SIZE):
-                num = self.board[row][col]
-                if num != 0:
-                    color = GRAY if self.solution[row][col] == num else BLUE
-                    self.draw_text(str(num), col * CELL_SIZE + CELL_SIZE // 2, row * CELL_SIZE + CELL_SIZE // 2, color)
+                self.draw_number(row, col)
 
         # Highlight selected cell
         if self.selected_cell:
-            row, col = self.selected_cell
-            pygame.draw.rect(self.screen, RED,
-                             (col * CELL_SIZE, row * CELL_SIZE, CELL_SIZE, CELL_SIZE), 3)
+            self.draw_selection()
 
         # Draw buttons
         pygame.draw.rect(self.screen, GREEN, (50, HEIGHT - 50, 200, 40))
@@ -181,9 +222,49 @@ class Sudoku:
         self.draw_text("Auto Solve", 150, HEIGHT - 30, WHITE)
         self.draw_text("New Puzzle", 450, HEIGHT - 30, WHITE)
 
+    def draw_grid_lines(self):
+        """Draw the grid lines."""
+        for i in range(GRID_SIZE + 1):
+            line_width = 3 if i % BOX_SIZE == 0 else 1
+            pygame.draw.line(self.screen, BLACK, (i * CELL_SIZE, 0), (i * CELL_SIZE, WIDTH), line_width)
+            pygame.draw.line(self.screen, BLACK, (0, i * CELL_SIZE), (WIDTH, i * CELL_SIZE), line_width)
+
+    def draw_number(self, row, col):
+        """Draw the number in one cell, if any."""
+        num = self.board[row][col]
+        if num != 0:
+            color = GRAY if self.solution[row][col] == num else BLUE
+            self.draw_text(str(num), col * CELL_SIZE + CELL_SIZE // 2, row * CELL_SIZE + CELL_SIZE // 2, color)
+
+    def draw_selection(self):
+        """Outline the selected cell."""
+        row, col = self.selected_cell
+        pygame.draw.rect(self.screen, RED,
+                         (col * CELL_SIZE, row * CELL_SIZE, CELL_SIZE, CELL_SIZE), 3)
+
+    def draw_dirty(self):
+        """Redraw only the cells that changed since the last frame and return their rectangles."""
+        rects = []
+        grid_rect = pygame.Rect(0, 0, WIDTH, WIDTH)
+        for row, col in self.dirty:
+            # Grow the cell to cover the grid lines around it
+            rect = pygame.Rect(col * CELL_SIZE - 2, row * CELL_SIZE - 2, CELL_SIZE + 4, CELL_SIZE + 4).clip(grid_rect)
+            self.screen.set_clip(rect)
+            self.screen.fill(WHITE, rect)
+            self.draw_grid_lines()
+            for i in range(max(row - 1, 0), min(row + 2, GRID_SIZE)):
+                for j in range(max(col - 1, 0), min(col + 2, GRID_SIZE)):
+                    self.draw_number(i, j)
+            if self.selected_cell:
+                self.draw_selection()
+            rects.append(rect)
+        self.screen.set_clip(None)
+        self.dirty.clear()
+        return rects
+
     def draw_text(self, text, x, y, color, font=FONT):
         """Draw text on the screen."""
-        text_surface = font.render(text, True, color)
+        text_surface = render_cache.text(font, text, color)
         text_rect = text_surface.get_rect(center=(x, y))
         self.screen.blit(text_surface, text_rect)
 
@@ -191,39 +272,76 @@ class Sudoku:
         """Handle clicks for selecting a cell or clicking buttons."""
         if pos[1] < WIDTH:  # Inside the grid
             col, row = pos[0] // CELL_SIZE, pos[1] // CELL_SIZE
+            if self.selected_cell:
+                self.dirty.add(self.selected_cell)
             self.selected_cell = (row, col)
+            self.dirty.add(self.selected_cell)
         else:  # Below the grid (buttons)
-            if 50 <= pos[0] <= 250:  # Auto Solve button
-                self.auto_solve()
+            if 50 <= pos[0] <= 250:  # Auto Solve button, or pause and resume
+                if self.animation:
+                    self.animation.pause()
+                else:
+                    self.stats = SearchStats()
+                    self.auto_solve(self.stats)
             elif 350 <= pos[0] <= 550:  # New Puzzle button
+                if self.animation:
+                    self.animation.cancel()
+                    self.animation = None
                 self.generate_board()
 
     def handle_key_press(self, key):
-        """Handle number input for the selected cell."""
+        """Handle number input for the selected cell, or the auto-solve controls while one plays."""
+        if self.animation:
+            if key == pygame.K_SPACE:
+                self.animation.pause()
+            elif key == pygame.K_UP:
+                self.animation.faster()
+            elif key == pygame.K_DOWN:
+                self.animation.slower()
+            elif key == pygame.K_RETURN:
+                self.animation.finish()
+            elif key == pygame.K_ESCAPE:
+                self.animation.cancel()
+            return
         if not self.selected_cell:
             return
         row, col = self.selected_cell
         if pygame.K_1 <= key <= pygame.K_9:
             num = key - pygame.K_0
-            if self.is_valid(row, col, num):
+            if self.index.can_place(row, col, num):
                 self.board[row][col] = num
+                self.index.set(row, col, num)
+                self.dirty.add((row, col))
         elif key == pygame.K_BACKSPACE:
             self.board[row][col] = 0
+            self.index.clear(row, col)
+            self.dirty.add((row, col))
 
     def play(self):
-        """Main game loop."""
+        """Main game loop: redraw only what changed, then sleep until the next event."""
         while self.running:
-            for event in pygame.event.get():
+            if self.animation:
+                self.step_animation()
+
+            if self.redraw_all:
+                self.draw_board()
+                pygame.display.flip()
+                self.dirty.clear()
+                self.redraw_all = False
+            elif self.dirty:
+                pygame.display.update(self.draw_dirty())
+
+            for event in self.wait_events(block=not self.animation or self.animation.paused):
                 if event.type == pygame.QUIT:
                     self.running = False
+                elif event.type == pygame.VIDEOEXPOSE:
+                    self.redraw_all = True
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     self.handle_mouse_click(pygame.mouse.get_pos())
                 elif event.type == pygame.KEYDOWN:
                     self.handle_key_press(event.key)
 
-            self.draw_board()
-            pygame.display.flip()
-
+        self.prefetch.close()
         pygame.quit()
 
 
@@ -1,38 +1,41 @@
 import random
 
-def generate_sudoku():
+from engine import count_solutions, solve
+
+def generate_sudoku(n=3):
     """
     Generates a random Sudoku puzzle with a unique solution.
+    :param n: int (box size, 3 for 9x9 and 4 for 16x16)
     """
-    board = [[0 for _ in range(9)] for _ in range(9)]
+    size = n * n
+    board = [[0 for _ in range(size)] for _ in range(size)]
 
     def fill_diagonal():
-        # Fill the diagonal 3x3 boxes
-        for i in range(0, 9, 3):
+        # Fill the diagonal boxes, which don't constrain each other
+        for i in range(0, size, n):
             fill_box(i, i)
 
     def fill_box(row, col):
-        nums = random.sample(range(1, 10), 9)
-        for i in range(3):
-            for j in range(3):
+        nums = random.sample(range(1, size + 1), size)
+        for i in range(n):
+            for j in range(n):
                 board[row + i][col + j] = nums.pop()
 
     def remove_numbers():
         # Randomly remove numbers to create a puzzle
-        attempts = 30
+        attempts = 30 * size * size // 81
         while attempts > 0:
-            row = random.randint(0, 8)
-            col = random.randint(0, 8)
+            row = random.randint(0, size - 1)
+            col = random.randint(0, size - 1)
             while board[row][col] == 0:
-                row = random.randint(0, 8)
-                col = random.randint(0, 8)
+                row = random.randint(0, size - 1)
+                col = random.randint(0, size - 1)
             # Backup the current number
             backup = board[row][col]
             board[row][col] = 0
 
             # Check if the board still has a unique solution
-            temp_board = [row[:] for row in board]
-            if not solve(temp_board) or not is_unique(temp_board):
+            if not is_unique(board):
                 board[row][col] = backup
             else:
                 attempts -= 1
@@ -41,28 +44,12 @@ def generate_sudoku():
         """
         Checks if a Sudoku board has a unique solution.
         """
-        solutions = []
-
-        def find_solution(temp_board):
-            if len(solutions) > 1:
-                return
-            find = find_empty(temp_board)
-            if not find:
-                solutions.append([row[:] for row in temp_board])
-                return
-            else:
-                row, col = find
-
-            for i in range(1, 10):
-                if valid(temp_board, i, (row, col)):
-                    temp_board[row][col] = i
-                    find_solution(temp_board)
-                    temp_board[row][col] = 0
-
-        find_solution(temp_board)
-        return len(solutions) == 1
+        return count_solutions(temp_board, limit=2) == 1
 
     fill_diagonal()
-    solve(board)  # Fill the remaining cells
+    while not solve(board):  # Fill the remaining cells
+        # Small boards can draw diagonal boxes that no grid completes
+        board = [[0 for _ in range(size)] for _ in range(size)]
+        fill_diagonal()
     remove_numbers()
     return board
\ No newline at end of file
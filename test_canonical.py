@@ -0,0 +1,52 @@
+"""
+Tests for canonical.py. Run with ``python -m unittest test_canonical``.
+"""
+
+import random
+import time
+import unittest
+
+from board import Board
+from canonical import apply_transform, canonical, canonical_transform
+
+TIME_LIMIT = 5.0  # Seconds; these took minutes before ties were merged
+
+PUZZLE = "000000010400000000020000000000050407008000300001090000300400200050100000000806000"
+
+
+def shuffled(bo, rng):
+    """
+    A random equivalent of a 9x9 board.
+    """
+    rows = [band * 3 + r for band in rng.sample(range(3), 3) for r in rng.sample(range(3), 3)]
+    cols = [stack * 3 + c for stack in rng.sample(range(3), 3) for c in rng.sample(range(3), 3)]
+    digits = [0] + rng.sample(range(1, 10), 9)
+    grid = [[digits[bo[r][c]] for c in cols] for r in rows]
+    return [list(col) for col in zip(*grid)] if rng.random() < 0.5 else grid
+
+
+class CanonicalTest(unittest.TestCase):
+
+    def assert_quick_and_invariant(self, bo):
+        rng = random.Random(0)
+        start = time.perf_counter()
+        form, transform = canonical_transform(bo)
+        self.assertLess(time.perf_counter() - start, TIME_LIMIT)
+        self.assertEqual(Board.from_lists(apply_transform(bo, transform)).to_string(), form)
+        self.assertEqual(canonical(shuffled(bo, rng)), form)
+        return form
+
+    def test_empty_board(self):
+        self.assertEqual(self.assert_quick_and_invariant([[0] * 9 for _ in range(9)]), "0" * 81)
+
+    def test_one_clue(self):
+        bo = [[0] * 9 for _ in range(9)]
+        bo[4][4] = 5
+        self.assertEqual(self.assert_quick_and_invariant(bo), "0" * 80 + "1")
+
+    def test_puzzle(self):
+        self.assert_quick_and_invariant(Board.from_string(PUZZLE).to_lists())
+
+
+if __name__ == "__main__":
+    unittest.main()
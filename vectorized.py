@@ -0,0 +1,142 @@
+"""
+NumPy batch solver.
+
+Works on a stack of boards shaped ``(N, 9, 9)`` and advances all of them at
+once: candidate masks come from vectorized row, column and box reductions, and
+naked and hidden singles are filled across the whole batch in one step. Only
+the boards that still need guessing are handed to a scalar solver.
+"""
+
+import numpy as np
+
+import solver
+
+ALL_DIGITS = 0x1FF
+DIGIT_BITS = (1 << np.arange(9)).astype(np.uint16)  # Bit for digits 1..9
+BIT_OF = np.concatenate(([0], DIGIT_BITS)).astype(np.uint16)  # Indexed by digit
+POPCOUNT = np.array([bin(m).count("1") for m in range(ALL_DIGITS + 1)], dtype=np.uint8)
+LOWEST_DIGIT = np.array([(m & -m).bit_length() for m in range(ALL_DIGITS + 1)], dtype=np.uint8)
+
+
+def _boxes(a):
+    """
+    Regroups a ``(N, 9, 9, ...)`` array as ``(N, box row, row, box col, col, ...)``.
+    """
+    return a.reshape((len(a), 3, 3, 3, 3) + a.shape[3:])
+
+
+def _expand_boxes(per_box):
+    """
+    Spreads a ``(N, 9)`` per-box value back over the 81 cells.
+    """
+    n = len(per_box)
+    grid = np.broadcast_to(per_box.reshape(n, 3, 1, 3, 1), (n, 3, 3, 3, 3))
+    return grid.reshape(n, 9, 9)
+
+
+def candidates(grid):
+    """
+    Computes candidate masks for a stack of boards.
+    :param grid: (N, 9, 9) uint8 array, 0 for empty cells
+    :return: (N, 9, 9) uint16 array (bit d - 1 set when digit d is legal,
+             0 for filled cells)
+    """
+    bits = BIT_OF[grid]
+    rows = np.bitwise_or.reduce(bits, axis=2)
+    cols = np.bitwise_or.reduce(bits, axis=1)
+    boxes = np.bitwise_or.reduce(_boxes(bits), axis=(2, 4)).reshape(-1, 9)
+    used = rows[:, :, None] | cols[:, None, :] | _expand_boxes(boxes)
+    return np.where(grid == 0, ~used & ALL_DIGITS, 0).astype(np.uint16)
+
+
+def _unit_counts(flags):
+    """
+    Counts a ``(N, 9, 9, 9)`` per-cell, per-digit flag over each unit.
+    :return: tuple of (N, 9, 9) arrays (row, column, box) by unit and digit
+    """
+    rows = flags.sum(axis=2, dtype=np.uint8)
+    cols = flags.sum(axis=1, dtype=np.uint8)
+    boxes = _boxes(flags).sum(axis=(2, 4), dtype=np.uint8).reshape(-1, 9, 9)
+    return rows, cols, boxes
+
+
+def _as_mask(flags):
+    """
+    Packs a ``(..., 9)`` boolean array over digits into a bitmask.
+    """
+    return (flags * DIGIT_BITS).sum(axis=-1, dtype=np.uint16)
+
+
+def propagate(grid):
+    """
+    Fills naked and hidden singles in a stack of boards, in place.
+    :param grid: (N, 9, 9) uint8 array, 0 for empty cells
+    :return: (N,) int8 array (1 solved, -1 no solution, 0 needs branching)
+    """
+    status = np.zeros(len(grid), dtype=np.int8)
+    active = np.arange(len(grid))
+    digits = np.arange(1, 10, dtype=np.uint8)
+
+    while active.size:
+        g = grid[active]
+        empty = g == 0
+
+        # A repeated digit means an earlier single (or a given) was contradictory
+        placed = g[..., None] == digits
+        dead = np.zeros(len(g), dtype=bool)
+        for counts in _unit_counts(placed):
+            dead |= (counts > 1).any(axis=(1, 2))
+
+        cand = candidates(g)
+        dead |= (empty & (cand == 0)).any(axis=(1, 2))
+
+        # Hidden singles: digits with exactly one possible cell in a unit
+        possible = (cand[..., None] & DIGIT_BITS) != 0
+        row_n, col_n, box_n = _unit_counts(possible)
+        row_p, col_p, box_p = _unit_counts(placed)
+        for n, p in ((row_n, row_p), (col_n, col_p), (box_n, box_p)):
+            dead |= ((n == 0) & (p == 0)).any(axis=(1, 2))  # Digit has no home
+        hidden = (
+            _as_mask(row_n == 1)[:, :, None]
+            | _as_mask(col_n == 1)[:, None, :]
+            | _expand_boxes(_as_mask(box_n == 1))
+        )
+        forced = cand & hidden
+        forced = np.where(POPCOUNT[cand] == 1, cand, forced)
+        dead |= (POPCOUNT[forced] > 1).any(axis=(1, 2))
+
+        progress = (forced != 0).any(axis=(1, 2)) & ~dead
+        full = ~empty.any(axis=(1, 2)) & ~dead
+        status[active[dead]] = -1
+        status[active[full]] = 1
+
+        g = np.where(forced != 0, LOWEST_DIGIT[forced], g)
+        grid[active[progress]] = g[progress]
+        active = active[progress]
+
+    return status
+
+
+def solve_batch(boards, solve_fn=solver.solve):
+    """
+    Solves a stack of boards.
+    :param boards: (N, 9, 9) array-like of ints, 0 for empty cells (left untouched)
+    :param solve_fn: function (solve(bo) -> bool) used on 2D lists for the
+                     boards that singles alone can't finish
+    :return: tuple ((N, 9, 9) uint8 array of solved boards,
+             (N,) bool array, True where the board was solved)
+    """
+    grid = np.array(boards, dtype=np.uint8)
+    if grid.ndim != 3 or grid.shape[1:] != (9, 9):
+        raise ValueError("boards must have shape (N, 9, 9)")
+
+    status = propagate(grid)
+    for i in np.flatnonzero(status == 0):
+        bo = grid[i].tolist()
+        if solve_fn(bo):
+            grid[i] = bo
+            status[i] = 1
+        else:
+            status[i] = -1
+
+    return grid, status == 1